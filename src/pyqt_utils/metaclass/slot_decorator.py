@@ -5,6 +5,12 @@ from pyqt_utils.python.decorators import entryExitDecFactory, exceptionDecFactor
 
 
 class SlotDecoratorMeta(AbcQtMeta):
+    """Log exceptions, entry and exit of `on*` methods.
+
+    Entry and exit are not logged, when debug decorators are disabled,
+    see `setDebugDecorators`.
+    """
+
     def __new__(cls, name, bases, namespace, **kwargs):
         for funName, fun in namespace.items():
             if not isinstance(fun, types.FunctionType):
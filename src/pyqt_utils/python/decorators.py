@@ -1,17 +1,58 @@
 import inspect
 import logging
+import os
 import sys
 import time
-from functools import partial, wraps
+from enum import Enum
+from functools import partial, update_wrapper, wraps
+from threading import Lock, get_ident
+from weakref import WeakKeyDictionary
 
 from decorator import decorator as baseDecorator
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QApplication
 
 from pyqt_utils.python.logger_skip_frame import SkipFrameInModule
+from pyqt_utils.python.timing_stats import timingRegistry
 
 SkipFrameInModule(__file__)
 _moduleLogger = logging.getLogger(__name__)
+DEBUG_DECORATORS_ENV = 'PYQT_UTILS_DEBUG_DECORATORS'
+
+
+def _debugDecoratorsFromEnvironment() -> bool:
+    """Read the environment variable `DEBUG_DECORATORS_ENV`.
+
+    By default, debug decorators are enabled,
+    but with python optimizations (`-O`) they are disabled.
+    """
+    match os.environ.get(DEBUG_DECORATORS_ENV, '').lower():
+        case '':
+            return __debug__
+        case '1' | 'true' | 'on':
+            return True
+        case '0' | 'false' | 'off':
+            return False
+        case value:
+            _moduleLogger.warning(f"Unknown {DEBUG_DECORATORS_ENV} value: {value}")
+            return __debug__
+
+
+_debugDecorators = _debugDecoratorsFromEnvironment()
+
+
+def setDebugDecorators(enabled: bool):
+    """Enable or disable debug decorators (e.g. `entryExitDecFactory`).
+
+    Only functions decorated later are affected,
+    so it should be called before modules with decorated functions are imported.
+    """
+    global _debugDecorators  # noqa: PLW0603 # SKIP: module level switch
+    _debugDecorators = enabled
+
+
+def isDebugDecorators() -> bool:
+    return _debugDecorators
 
 
 def _lessArgAttempt(fun, *args, **kw):
@@ -28,6 +69,20 @@ def _lessArgAttempt(fun, *args, **kw):
 _lessArgAttemptDec = baseDecorator(_lessArgAttempt, kwsyntax=True)  # type: ignore[reportCallIssue]
 
 
+def _lessArgAttemptWrapper(fun):
+    """Wrap function without signature, `decorator` library cannot decorate it.
+
+    The wrapper accepts any arguments and drops them after `TypeError`.
+    """
+
+    def lessArgAttemptWrapper(*args, **kwargs):
+        return _lessArgAttempt(fun, *args, **kwargs)
+
+    wrapper = update_wrapper(lessArgAttemptWrapper, fun)
+    del wrapper.__wrapped__  # signature of the wrapper is used, not of `fun`
+    return wrapper
+
+
 def decoratorForSlot(decoratorFun):
     """Fix for compatibility for decorator library >= 5.
 
@@ -35,6 +90,12 @@ def decoratorForSlot(decoratorFun):
     Wrong number of parameters may be when there is missing `pyqtSlot` decorator.
     `pyqtSlot` should be used before any of these decorators.
 
+    Number of accepted positional arguments is computed once, when a function
+    is decorated, and additional arguments are dropped before the decorator call.
+    If signature is not available (e.g. some builtins),
+    arguments are dropped after `TypeError`.
+    Options of the decorator, which it does not accept, raise `TypeError`.
+
     `pyqtSlot` may not work in the following example:
     >>>        import decorator
     >>>        from PyQt5.QtCore import pyqtSlot, pyqtSignal, QObject
@@ -60,29 +121,106 @@ def decoratorForSlot(decoratorFun):
     >>>        foo.sig.emit('isOk?')
     """
     dec = baseDecorator(decoratorFun, kwsyntax=True)  # type: ignore[reportCallIssue]
+    decParams = [
+        p
+        for p in inspect.signature(decoratorFun).parameters.values()
+        if p.kind is inspect.Parameter.POSITIONAL_OR_KEYWORD
+    ]
+    options = {p.name for p in decParams[1:]}
+    isPlainFunction = not (
+        inspect.iscoroutinefunction(decoratorFun)
+        or inspect.isgeneratorfunction(decoratorFun)
+    )
+
+    def _decorate(fun, args, kwargs):
+        try:
+            capacity = _positionalCapacity(fun)
+        except (TypeError, ValueError):
+            fun = _lessArgAttemptWrapper(fun)
+            capacity = None
+        if not isPlainFunction:
+            return dec(_lessArgAttemptDec(fun), *args, **kwargs)
+
+        # the same extra arguments, as `decorator` library passes to the caller
+        extras = args + tuple(
+            kwargs.get(p.name, p.default)
+            for p in decParams[len(args) + 1 :]
+            if p.default is not inspect.Parameter.empty
+        )
+
+        @wraps(fun)
+        def _decoratorForSlotWrapper(*funArgs, **funKwargs):
+            return decoratorFun(fun, *extras, *funArgs[:capacity], **funKwargs)
+
+        return _decoratorForSlotWrapper
 
     def _decoratorForSlotInner(fun=None, *args, **kwargs):
+        if unknown := kwargs.keys() - options:
+            msg = f"{decoratorFun.__name__}() got unknown options: {sorted(unknown)}"
+            raise TypeError(msg)
         if fun is None:  # maybe this is a factory decorator
-            return lambda f: dec(_lessArgAttemptDec(f), *args, **kwargs)
+            return lambda f: _decorate(f, args, kwargs)
 
-        return dec(_lessArgAttemptDec(fun), *args, **kwargs)
+        return _decorate(fun, args, kwargs)
 
     return _decoratorForSlotInner
 
 
+def _positionalCapacity(fun) -> int | None:
+    """Return the maximal number of positional arguments, None if not limited.
+
+    Bound methods and `functools.partial` are handled by `inspect.signature`,
+    which raises `TypeError` or `ValueError` if signature is not available.
+    """
+    capacity = 0
+    for param in inspect.signature(fun).parameters.values():
+        match param.kind:
+            case inspect.Parameter.VAR_POSITIONAL:
+                return None
+            case (
+                inspect.Parameter.POSITIONAL_ONLY
+                | inspect.Parameter.POSITIONAL_OR_KEYWORD
+            ):
+                capacity += 1
+    return capacity
+
+
 def lessArgDec(fun):
+    """Drop positional arguments, which are not accepted by the function.
+
+    Number of accepted arguments is computed once, when the function is decorated.
+    Function is returned unchanged, if it accepts any number of arguments
+    or its signature is not available.
+    """
+    try:
+        capacity = _positionalCapacity(fun)
+    except (TypeError, ValueError):
+        return fun
+    if capacity is None:
+        return fun
+
     @wraps(fun)
     def _lessArgDecInner(*args, **kwargs):
-        try:
-            return fun(*args, **kwargs)
-        except TypeError:
-            sig = inspect.signature(fun)
-            args = args[: len(sig.parameters)]
-            return fun(*args, **kwargs)
+        return fun(*args[:capacity], **kwargs)
 
     return _lessArgDecInner
 
 
+def _debugOnly(decObj):
+    """Skip the decorator, if debug decorators are disabled.
+
+    Surplus arguments are still dropped by `lessArgDec`,
+    so the function can be connected to signals the same way.
+    """
+
+    def _debugOnlyInner(fun, *args, **kwargs):
+        if not _debugDecorators:
+            return lessArgDec(fun)
+        return decObj(fun, *args, **kwargs)
+
+    return _debugOnlyInner
+
+
 def _extractLoggerInner(decoratedFun) -> logging.Logger | None:
     if mod := sys.modules.get(decoratedFun.__module__, None):
         return getattr(mod, 'logger', None)
@@ -90,15 +228,15 @@ def _extractLoggerInner(decoratedFun) -> logging.Logger | None:
 
 
 def _extractLogger(decObj):
-    def _extractLoggerFunOrArg(decoratedFun=None, logger=None):
+    def _extractLoggerFunOrArg(decoratedFun=None, logger=None, **decKwargs):
         nonlocal decObj
 
         match decoratedFun, logger:
             case None, None:  # called with no args
-                return _extractLoggerFunOrArg
+                return partial(_extractLoggerFunOrArg, **decKwargs)
 
             case None, logging.Logger():
-                return partial(_extractLoggerFunOrArg, logger=logger)
+                return partial(_extractLoggerFunOrArg, logger=logger, **decKwargs)
 
             case None, _:
                 msg = f"Unknown logger parameter type {type(logger)}"
@@ -109,13 +247,13 @@ def _extractLogger(decObj):
                 raise TypeError(msg)
 
             case decoratedFun, logging.Logger():
-                return decObj(decoratedFun, logger)
+                return decObj(decoratedFun, logger, **decKwargs)
 
             case decoratedFun, None:
                 if (logger := _extractLoggerInner(decoratedFun)) is None:
                     # we use default logger defined in a decorator
-                    return decObj(decoratedFun)
-                return decObj(decoratedFun, logger)
+                    return decObj(decoratedFun, **decKwargs)
+                return decObj(decoratedFun, logger, **decKwargs)
 
             case _:
                 msg = "Unknown logger parameters"
@@ -137,8 +275,17 @@ def exceptionDecFactory(
 
 
 @_extractLogger
+@_debugOnly
 @decoratorForSlot
 def entryExitDecFactory(fun, logger=_moduleLogger, *args, **kwargs):
+    """Log entry and exit of the function.
+
+    `Logger.isEnabledFor` result is cached by the logger until a level is changed,
+    so messages are not formatted, when DEBUG level is disabled.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return fun(*args, **kwargs)
+
     logger.debug(f"Before: {fun.__name__}")
     result = fun(*args, **kwargs)
     logger.debug(f"After: {fun.__name__}")
@@ -147,12 +294,28 @@ def entryExitDecFactory(fun, logger=_moduleLogger, *args, **kwargs):
 
 @_extractLogger
 @decoratorForSlot
-def timeDecFactory(fun, logger=_moduleLogger, *args, **kwargs):
-    start = time.time()
+def timeDecFactory(fun, logger=_moduleLogger, stats=None, *args, **kwargs):
+    """Log execution time of each call.
+
+    If `stats` is set (`True` means the default `timingRegistry`),
+    durations are only aggregated in `TimingRegistry` instead of logging.
+    Without `stats`, time is not measured, when DEBUG level is disabled.
+    """
+    if (stats is None or stats is False) and not logger.isEnabledFor(logging.DEBUG):
+        return fun(*args, **kwargs)
+
+    start = time.perf_counter_ns()
     try:
         return fun(*args, **kwargs)
     finally:
-        logger.debug(f"{fun.__name__}, execute time:{time.time() - start :.4f}s")
+        end = time.perf_counter_ns()
+        match stats:
+            case None | False:
+                logger.debug(f"{fun.__name__}, execute time:{(end - start) / 1e9:.4f}s")
+            case True:
+                timingRegistry.record(fun, end - start, end)
+            case _:
+                stats.record(fun, end - start, end)
 
 
 @decoratorForSlot
@@ -164,15 +327,101 @@ def cursorDecFactory(fun, cursor=Qt.WaitCursor, *args, **kwargs):
         QApplication.restoreOverrideCursor()
 
 
+class SingleCallScope(Enum):
+    FUNCTION = 'function'
+    """Only one call of the function at a time."""
+    INSTANCE = 'instance'
+    """Only one call for the instance (the first argument) at a time."""
+    THREAD = 'thread'
+    """Only one call for the instance in each thread, so only recursion is blocked."""
+
+
+class _SingleCallState:
+    __slots__ = ('owners', 'pending')
+
+    def __init__(self):
+        self.owners: set[int | None] = set()
+        """Thread ids for `SingleCallScope.THREAD`, otherwise None."""
+        self.pending: dict[int | None, tuple[tuple, dict]] = {}
+        """Arguments of the trailing call for each owner."""
+
+
+class _SingleCallGuard:
+    def __init__(self):
+        self.lock = Lock()
+        self._functionState = _SingleCallState()
+        self._instanceStates: WeakKeyDictionary[object, _SingleCallState] = (
+            WeakKeyDictionary()
+        )
+
+    def state(self, instance) -> _SingleCallState:
+        """Return state of the instance, must be called with the lock.
+
+        The function state is used, if the instance is not hashable
+        or weak-referenceable.
+        """
+        if instance is None:
+            return self._functionState
+        try:
+            return self._instanceStates.setdefault(instance, _SingleCallState())
+        except TypeError:
+            return self._functionState
+
+
+_SINGLE_CALL_ATTR = '__single_call_guard__'
+_singleCallLock = Lock()
+
+
+def _getSingleCallGuard(fun) -> _SingleCallGuard:
+    if (guard := getattr(fun, _SINGLE_CALL_ATTR, None)) is not None:
+        return guard
+    with _singleCallLock:
+        if (guard := getattr(fun, _SINGLE_CALL_ATTR, None)) is None:
+            guard = _SingleCallGuard()
+            setattr(fun, _SINGLE_CALL_ATTR, guard)
+        return guard
+
+
 @decoratorForSlot
 def singleCallDecFactory(
-    fun, *args, attrName='__is_calling__', callingDefaultValue=None, **kwargs
+    fun,
+    callingDefaultValue=None,
+    scope=SingleCallScope.INSTANCE,
+    coalesce=False,
+    *args,
+    **kwargs,
 ):
-    isCalling = getattr(fun, attrName, False)
-    if isCalling:
-        return callingDefaultValue
-    setattr(fun, attrName, True)
+    """Ignore calls, while the function is already running in `scope`.
+
+    Ignored call returns `callingDefaultValue`. With `coalesce`,
+    the last ignored call is made after the running call finishes.
+
+    By default calls are blocked per instance (the first argument),
+    previously a running call blocked all instances,
+    use `scope=SingleCallScope.FUNCTION` for that behaviour.
+    The removed `attrName` option raises `TypeError`.
+    """
+    guard = _getSingleCallGuard(fun)
+    instance = args[0] if args and scope is not SingleCallScope.FUNCTION else None
+    owner = get_ident() if scope is SingleCallScope.THREAD else None
+
+    with guard.lock:
+        state = guard.state(instance)
+        if owner in state.owners:
+            if coalesce:
+                state.pending[owner] = (args, kwargs)
+            return callingDefaultValue
+        state.owners.add(owner)
+
     try:
-        return fun(*args, **kwargs)
+        result = fun(*args, **kwargs)
+        while coalesce:
+            with guard.lock:
+                if (pending := state.pending.pop(owner, None)) is None:
+                    break
+            fun(*pending[0], **pending[1])
+        return result
     finally:
-        setattr(fun, attrName, False)
+        with guard.lock:
+            state.owners.discard(owner)
+            state.pending.pop(owner, None)  # not made, if the call failed
@@ -1,16 +1,46 @@
 import logging
 from collections.abc import Callable
+from enum import Enum
+from typing import Any, Protocol, overload
+
+from pyqt_utils.python.timing_stats import TimingRegistry
 
 type _Decorator[_BaseFun: Callable] = Callable[[_BaseFun], _BaseFun]
 
-def decoratorForSlot(decoratorFun: _Decorator) -> _Decorator: ...
+DEBUG_DECORATORS_ENV: str
+
+def setDebugDecorators(enabled: bool) -> None: ...
+def isDebugDecorators() -> bool: ...
+
+class SingleCallScope(Enum):
+    FUNCTION = 'function'
+    INSTANCE = 'instance'
+    THREAD = 'thread'
+
+# decorated function accepts surplus arguments, result is from the decorator
+class _SlotDecorator(Protocol):
+    @overload
+    def __call__(self, fun: Callable, /) -> Callable[..., Any]: ...
+    @overload
+    def __call__(
+        self, fun: None = None, /, **kwargs
+    ) -> Callable[[Callable], Callable[..., Any]]: ...
+
+def decoratorForSlot(decoratorFun: Callable[..., Any]) -> _SlotDecorator: ...
 def lessArgDec(fun): ...
 def exceptionDecFactory(
     *, logger: logging.Logger | None = None, level: int = ...
 ) -> _Decorator: ...
 def entryExitDecFactory(*, logger: logging.Logger | None = None) -> _Decorator: ...
-def timeDecFactory(*, logger: logging.Logger | None = None) -> _Decorator: ...
+def timeDecFactory(
+    *,
+    logger: logging.Logger | None = None,
+    stats: TimingRegistry | bool | None = None,
+) -> _Decorator: ...
 def cursorDecFactory(*, cursor=...) -> _Decorator: ...
 def singleCallDecFactory(
-    *, attrName: str = '__is_calling__', callingDefaultValue=None
+    *,
+    callingDefaultValue=None,
+    scope: SingleCallScope = ...,
+    coalesce: bool = False,
 ) -> _Decorator: ...
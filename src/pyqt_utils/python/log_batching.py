@@ -0,0 +1,223 @@
+"""Batching of log lines, to log output of chatty processes cheaply.
+
+Lines are joined into a single log record, when `maxLines` are collected
+or the oldest line waits `maxDelay` seconds.
+Optionally, records are passed to handlers in a listener thread.
+"""
+
+import atexit
+import logging
+import time
+import weakref
+from collections.abc import Callable, Iterable
+from enum import Enum
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from threading import Lock, Thread
+from typing import NamedTuple, cast
+
+logger = logging.getLogger(__name__)
+
+
+class OverflowPolicy(Enum):
+    DROP = 'drop'
+    """Lines over the rate are dropped, only their number is logged."""
+    SAMPLE = 'sample'
+    """Only every `sampleEvery` line over the rate is logged."""
+
+
+class LogBatchConfig(NamedTuple):
+    maxLines: int = 1000
+    maxDelay: float = 0.5
+    maxRate: int | None = None
+    """Maximal number of lines per second, the rest is handled by `overflow`."""
+    overflow: OverflowPolicy = OverflowPolicy.DROP
+    sampleEvery: int = 100
+
+
+class LineBatcher:
+    """Collect lines and pass them joined to `emit`."""
+
+    def __init__(
+        self, emit: Callable[[str], None], config: LogBatchConfig | None = None
+    ):
+        self.config = LogBatchConfig() if config is None else config
+        self._emit = emit
+        self._lock = Lock()
+        self._lines: list[str] = []
+        self._pendingSince: float | None = None
+        self._skipped = 0
+        self._windowStart = time.monotonic()
+        self._windowCount = 0
+        _flusher.add(self)
+
+    def add(self, line: str):
+        now = time.monotonic()
+        with self._lock:
+            if self._pendingSince is None:
+                self._pendingSince = now
+            if self._isWithinRate(now):
+                self._lines.append(line)
+            else:
+                self._skipped += 1
+
+            if (
+                len(self._lines) < self.config.maxLines
+                and now - self._pendingSince < self.config.maxDelay
+            ):
+                return
+            text = self._takeText()
+
+        self._emit(text)
+
+    def _isWithinRate(self, now: float) -> bool:
+        if (maxRate := self.config.maxRate) is None:
+            return True
+
+        if now - self._windowStart >= 1:
+            self._windowStart = now
+            self._windowCount = 0
+        self._windowCount += 1
+
+        if (overRate := self._windowCount - maxRate) <= 0:
+            return True
+        return (
+            self.config.overflow == OverflowPolicy.SAMPLE
+            and overRate % self.config.sampleEvery == 0
+        )
+
+    def _takeText(self) -> str:
+        if self._skipped:
+            self._lines.append(f"[{self._skipped} lines skipped]")
+        text = '\n'.join(self._lines)
+        self._lines.clear()
+        self._pendingSince = None
+        self._skipped = 0
+        return text
+
+    def flush(self):
+        with self._lock:
+            if self._pendingSince is None:
+                return
+            text = self._takeText()
+        self._emit(text)
+
+    def flushIfDue(self, now: float):
+        pendingSince = self._pendingSince
+        if pendingSince is not None and now - pendingSince >= self.config.maxDelay:
+            self.flush()
+
+
+class _BatchFlusher:
+    """Single thread flushing lines waiting too long in all batchers."""
+
+    TICK = 0.1
+
+    def __init__(self):
+        self._batchers: weakref.WeakSet[LineBatcher] = weakref.WeakSet()
+        self._lock = Lock()
+        self._thread: Thread | None = None
+
+    def add(self, batcher: LineBatcher):
+        with self._lock:
+            self._batchers.add(batcher)
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name=type(self).__name__)
+                self._thread.daemon = True
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.TICK)
+            with self._lock:
+                if not (batchers := list(self._batchers)):
+                    self._thread = None
+                    return
+
+            now = time.monotonic()
+            for batcher in batchers:
+                try:
+                    batcher.flushIfDue(now)
+                except Exception:
+                    logger.exception("Cannot flush log lines")
+
+
+_flusher = _BatchFlusher()
+
+
+class _ParentHandler(logging.Handler):
+    """Pass records to the logger, as if they were propagated to it."""
+
+    def __init__(self, parent: logging.Logger):
+        super().__init__()
+        self.parent = parent
+
+    def emit(self, record: logging.LogRecord):
+        self.parent.callHandlers(record)
+
+
+class _TargetQueueHandler(QueueHandler):
+    """Put records to the shared queue, together with handlers handling them."""
+
+    def __init__(self, targets: tuple[logging.Handler, ...]):
+        super().__init__(_queue)
+        self.targets = targets
+
+    def enqueue(self, record: logging.LogRecord):
+        _ensureQueueListener()
+        self.queue.put_nowait((record, self.targets))
+
+
+class _TargetQueueListener(QueueListener):
+    def handle(self, record: logging.LogRecord):
+        # records are queued together with their targets by `_TargetQueueHandler`
+        queuedRecord, targets = cast('_QueuedRecord', record)
+        queuedRecord = self.prepare(queuedRecord)
+        for handler in targets:
+            if queuedRecord.levelno >= handler.level:
+                handler.handle(queuedRecord)
+
+
+type _QueuedRecord = tuple[logging.LogRecord, tuple[logging.Handler, ...]]
+_queue: SimpleQueue[_QueuedRecord] = SimpleQueue()
+_queueLock = Lock()
+_queueListener: _TargetQueueListener | None = None
+
+
+def _ensureQueueListener():
+    global _queueListener  # noqa: PLW0603 # SKIP: single listener for the module
+    if _queueListener is not None:
+        return
+
+    with _queueLock:
+        if _queueListener is None:
+            _queueListener = _TargetQueueListener(_queue)
+            _queueListener.start()
+
+
+def getQueueHandler(
+    handlers: Iterable[logging.Handler] = (), parent: logging.Logger | None = None
+) -> QueueHandler:
+    """Return handler, which passes records to `handlers` in a listener thread.
+
+    If `parent` is set, records are also handled by it, as if they were propagated.
+    All handlers share a single listener thread, which is started by the first record.
+    """
+    targets = [*handlers]
+    if parent is not None:
+        targets.append(_ParentHandler(parent))
+    return _TargetQueueHandler(tuple(targets))
+
+
+@atexit.register
+def stopQueueListeners():
+    """Stop the listener thread, after all queued records are handled.
+
+    The thread is started again by the next record.
+    """
+    global _queueListener
+    with _queueLock:
+        listener, _queueListener = _queueListener, None
+
+    if listener is not None:
+        listener.stop()
@@ -1,17 +1,47 @@
+import codecs
+import concurrent.futures
+import contextlib
 import ctypes
+import heapq
+import itertools
 import logging
+import os
 import re
+import resource
+import selectors
 import shlex
 import signal
-from collections.abc import Callable, Iterable
-from functools import wraps
+import stat
+import weakref
+from collections.abc import Buffer, Callable, Iterable, Iterator
+from concurrent.futures import Future
+from functools import partial, wraps
+from io import BufferedIOBase, RawIOBase, TextIOWrapper
 from pathlib import Path
-from subprocess import PIPE, Popen
-from threading import Thread
-from typing import overload
+from subprocess import PIPE, Popen, TimeoutExpired
+from threading import Event, Lock, Thread
+from typing import IO, Literal, NamedTuple, Self, overload
+
+from pyqt_utils.python.log_batching import (
+    LineBatcher,
+    LogBatchConfig,
+    getQueueHandler,
+)
+from pyqt_utils.python.process_stats import (
+    ProcessStats,
+    ProcessStatsRegistry,
+    processWaiter,
+)
 
 logger = logging.getLogger(__name__)
 type StrPopen = Popen[str]
+type BytesPopen = Popen[bytes]
+type AnyPopen = StrPopen | BytesPopen
+
+_launchArguments: weakref.WeakKeyDictionary[Popen, tuple[tuple, dict]] = (
+    weakref.WeakKeyDictionary()
+)
+"""Arguments of `openProcessWrapper` for each process, see `relaunchProcess`."""
 
 
 def createPreExecForParentDeath(sig=signal.SIGTERM):
@@ -33,122 +63,646 @@ def createPreExecForParentDeath(sig=signal.SIGTERM):
     return preExec
 
 
+@overload
+def openProcessWrapper(
+    *args, shell: bool = False, binary: Literal[False] = False, **kwargs
+) -> StrPopen: ...
+
+
+@overload
+def openProcessWrapper(
+    *args, shell: bool = False, binary: Literal[True], **kwargs
+) -> BytesPopen: ...
+
+
+@overload
+def openProcessWrapper(
+    *args, shell: bool = False, binary: bool, **kwargs
+) -> AnyPopen: ...
+
+
 @wraps(Popen.__init__)
-def openProcessWrapper(*args, shell=False, **kwargs) -> StrPopen:
+def openProcessWrapper(*args, shell=False, binary=False, **kwargs) -> AnyPopen:
     logger.info(f"Run command {args}")
-    process: StrPopen = Popen(
+    launchKwargs = {'shell': shell, 'binary': binary, **kwargs}
+    if not binary:
+        kwargs.update(encoding='UTF-8', text=True)
+    process = Popen(
         *args,
         shell=shell,
         stdout=PIPE,
         stderr=PIPE,
-        encoding='UTF-8',
-        text=True,
         **kwargs,
     )
+    _launchArguments[process] = (args, launchKwargs)
+
+    logger.info(formatProcessArgs(process.args))
+    return process
+
+
+def relaunchProcess(process: AnyPopen) -> AnyPopen:
+    """Start the process again with the same arguments as `openProcessWrapper`.
+
+    Options like `cwd` or `env` are not known for processes started by `Popen`,
+    then only `args` are used.
+    """
+    if (launch := _launchArguments.get(process)) is None:
+        launch = ((process.args,), {'shell': isinstance(process.args, str)})
+    args, kwargs = launch
+    return openProcessWrapper(*args, **kwargs)
+
 
-    match process.args:
+def formatProcessArgs(args) -> str:
+    match args:
         case str(strArgs):
-            pass
+            return strArgs
         case Path() as pathArg:
-            strArgs = str(pathArg)
+            return str(pathArg)
         case list(listArgs):
-            strArgs = shlex.join([str(s) for s in listArgs])
+            return shlex.join([str(s) for s in listArgs])
         case _:
-            msg = f"Unexpected type of process.args: {type(process.args)}"
+            msg = f"Unexpected type of process.args: {type(args)}"
             raise TypeError(msg)
 
-    logger.info(strArgs)
-    return process
+
+class LineBuffer:
+    """Split decoded chunks of bytes into stripped, non-empty lines."""
+
+    def __init__(self, maxLineLength: int, encoding: str = 'UTF-8'):
+        self.maxLineLength = maxLineLength
+        self._decoder = codecs.getincrementaldecoder(encoding)('replace')
+        self._pending = ''
+
+    def feed(self, data: Buffer) -> list[str]:
+        return self._split(self._decoder.decode(data))
+
+    def flush(self) -> list[str]:
+        """Return the remaining lines, including the last not terminated one."""
+        lines = self._split(self._decoder.decode(b'', final=True))
+        if strippedLine := self._pending.strip():
+            lines.append(strippedLine)
+        self._pending = ''
+        return lines
+
+    def _split(self, text: str) -> list[str]:
+        *fullLines, self._pending = (self._pending + text).split('\n')
+        size = self.maxLineLength
+        lines: list[str] = []
+        for line in fullLines:
+            parts = (line[i : i + size] for i in range(0, len(line), size))
+            lines.extend(stripped for p in parts if (stripped := p.strip()))
+
+        while len(self._pending) > size:
+            if strippedLine := self._pending[:size].strip():
+                lines.append(strippedLine)
+            self._pending = self._pending[size:]
+        return lines
+
+
+class _HubStream(NamedTuple):
+    stream: TextIOWrapper
+    buffer: LineBuffer
+    callback: Callable[[str], None]
+    reader: 'OutputReader'
+    process: AnyPopen
+    isError: bool
+
+
+class OutputReaderHub:
+    """Read output of many processes by a single thread.
+
+    Pipes are multiplexed by `selectors` (`epoll` on Linux),
+    so instead of 2 threads per process, only one thread is used.
+    Hooks of all readers are called from this thread.
+
+    Example:
+    >>> hub = OutputReaderHub()
+    >>> for _ in range(100):
+    ...     isStarted = runProcessAsync(['echo', 'test'], hub=hub)
+    >>> hub.close()
+    """
+
+    READ_SIZE = 64 * 1024
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._lock = Lock()
+        self._pending: list[_HubStream] = []
+        self._isClosed = False
+
+        self._wakeupRead, self._wakeupWrite = os.pipe()
+        os.set_blocking(self._wakeupRead, False)
+        os.set_blocking(self._wakeupWrite, False)
+        self._selector.register(self._wakeupRead, selectors.EVENT_READ)
+
+        self._thread = Thread(target=self._run, name=type(self).__name__)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def register(self, process: AnyPopen, reader: 'OutputReader'):
+        """Read output of the process, hub becomes the owner of its streams.
+
+        Only text streams are supported, binary ones raise `TypeError`.
+        """
+        streams = []
+        for stream, callback, isError in (
+            (process.stdout, reader.processOutput, False),
+            (process.stderr, reader.processError, True),
+        ):
+            if stream is None:
+                reader.streamClosed(process)
+                continue
+            if not isinstance(stream, TextIOWrapper):
+                msg = "Binary output cannot be read by a hub"
+                raise TypeError(msg)
+
+            os.set_blocking(stream.fileno(), False)
+            buffer = LineBuffer(reader.maxLineLength, stream.encoding)
+            streams.append(
+                _HubStream(stream, buffer, callback, reader, process, isError)
+            )
+
+        with self._lock:
+            if self._isClosed:
+                msg = "Hub is closed"
+                raise RuntimeError(msg)
+            self._pending.extend(streams)
+        self._wakeup()
+
+    def close(self, wait: bool = True):
+        """Stop the thread after all registered streams are closed."""
+        with self._lock:
+            self._isClosed = True
+        self._wakeup()
+        if wait:
+            self._thread.join()
+
+    def _wakeup(self):
+        with contextlib.suppress(BlockingIOError):
+            os.write(self._wakeupWrite, b'\0')
+
+    def _run(self):
+        try:
+            while True:
+                for key, _events in self._selector.select():
+                    if key.data is None:
+                        with contextlib.suppress(BlockingIOError):
+                            os.read(self._wakeupRead, self.READ_SIZE)
+                    else:
+                        self._readStream(key.fd, key.data)
+
+                with self._lock:
+                    pending, self._pending = self._pending, []
+                    isClosed = self._isClosed
+                for hubStream in pending:
+                    self._selector.register(
+                        hubStream.stream.fileno(), selectors.EVENT_READ, hubStream
+                    )
+                if isClosed and len(self._selector.get_map()) == 1:
+                    break
+        finally:
+            self._selector.close()
+            os.close(self._wakeupRead)
+            os.close(self._wakeupWrite)
+
+    def _readStream(self, fd: int, hubStream: _HubStream):
+        try:
+            data = os.read(fd, self.READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            logger.exception(f"Cannot read output of {hubStream.process.pid=}")
+            data = b''
+
+        if data:
+            if (stats := hubStream.reader.stats) is not None:
+                stats.addRead(hubStream.isError, len(data), data.count(b'\n'))
+            self._dispatch(hubStream, hubStream.buffer.feed(data))
+            return
+
+        self._selector.unregister(fd)
+        self._dispatch(hubStream, hubStream.buffer.flush())
+        hubStream.stream.close()
+        self._dispatch(hubStream, None)
+
+    @staticmethod
+    def _dispatch(hubStream: _HubStream, lines: list[str] | None):
+        try:
+            if lines is None:
+                hubStream.reader.streamClosed(hubStream.process)
+                return
+            for line in lines:
+                hubStream.callback(line)
+        except Exception:
+            logger.exception(f"Error in reader of {hubStream.process.pid=}")
 
 
 class OutputReader:
-    def __init__(self, process: StrPopen, **kwargs):
+    MAX_LINE_LENGTH = 64 * 1024
+    """Longer lines are passed to hooks in parts of this length."""
+    BINARY = False
+    """Whether the process must be opened with `binary=True`."""
+
+    def __init__(
+        self,
+        process: AnyPopen,
+        *,
+        maxLineLength: int = MAX_LINE_LENGTH,
+        hub: OutputReaderHub | None = None,
+        statsRegistry: ProcessStatsRegistry | None = None,
+        **kwargs,
+    ):
+        """Start reading output of the process.
+
+        Lines are passed to hooks as soon as they are read.
+        Size of the pipe buffer can be set by `bufsize` argument of `Popen`.
+
+        :param hub: If set, streams are read by the hub thread,
+            otherwise two threads are started for this process.
+        :param statsRegistry: If set, `ProcessStats` are collected to `stats`
+            and added to the registry after the process exits.
+            Then the process is waited for by `processWaiter`,
+            and `processFinished` is called by its thread.
+        """
         self.originalProcess = process
-        self.outputThread = self._startThread(process, target=self._readOutput)
-        self.stderrThread = self._startThread(process, target=self._readError)
+        self.maxLineLength = maxLineLength
+        self.hub = hub
+        self.statsRegistry = statsRegistry
+        self.stats: ProcessStats | None = None
+        self._streamLock = Lock()
+        self._openStreams = 0
+        self._finished = Event()
+        self._startReading(process)
+
+    def _startReading(self, process: AnyPopen):
+        with self._streamLock:
+            self._openStreams += 2
+            self._finished.clear()
+        if self.statsRegistry is not None:
+            self.stats = ProcessStats.fromProcess(process)
+
+        if self.hub is not None:
+            self.hub.register(process, self)
+        else:
+            self.outputThread = self._startThread(process, target=self._readOutput)
+            self.stderrThread = self._startThread(process, target=self._readError)
 
     @classmethod
-    def _startThread(cls, process: StrPopen, target: Callable[[StrPopen], None]):
+    def _startThread(
+        cls,
+        process: AnyPopen,
+        target: Callable[[AnyPopen], None],
+    ):
         th = Thread(
             target=target,
-            name=f"{process.args}.{target.__name__}",
+            name=f"{process.args!r}.{target.__name__}",
             args=(process,),
         )
         th.daemon = True
         th.start()
         return th
 
-    def _readOutput(self, process: StrPopen):
-        if process.stdout is None:
+    def join(self, timeout: float | None = None) -> bool:
+        """Wait until all streams are read, return False on timeout."""
+        return self._finished.wait(timeout)
+
+    def streamClosed(self, process: AnyPopen):
+        with self._streamLock:
+            self._openStreams -= 1
+            if self._openStreams:
+                return
+
+        if self.stats is not None:
+            processWaiter.add(process, partial(self._processExited, process))
+        else:
+            self._finishProcess(process)
+
+    def _processExited(self, process: AnyPopen, usage: resource.struct_rusage | None):
+        """Called by `processWaiter` thread, when stats are collected."""
+        if self.stats is not None and self.statsRegistry is not None:
+            self.stats.finish(process, usage)
+            self.statsRegistry.add(self.stats)
+        self._finishProcess(process)
+
+    def _finishProcess(self, process: AnyPopen):
+        self.processFinished(process)
+        with self._streamLock:
+            if not self._openStreams:  # hook can start reading again
+                self._finished.set()
+
+    def _iterLines(
+        self, stream: IO[str] | IO[bytes] | None, isError: bool
+    ) -> Iterator[str]:
+        if stream is None:
             return
+        if not isinstance(stream, TextIOWrapper):
+            msg = f"{type(self).__name__} requires a process opened in text mode"
+            raise TypeError(msg)
 
-        for line in process.stdout.readlines():
-            if not (strippedLine := line.strip()):
-                continue
-            self.processOutput(strippedLine)
+        stats = self.stats
+        for line in iter(partial(stream.readline, self.maxLineLength), ''):
+            if stats is not None:
+                stats.addRead(isError, len(line), line.endswith('\n'))
+            if strippedLine := line.strip():
+                yield strippedLine
+
+    def _readOutput(self, process: AnyPopen):
+        try:
+            for line in self._iterLines(process.stdout, isError=False):
+                self.processOutput(line)
+        finally:
+            self.streamClosed(process)
 
     def processOutput(self, line: str):
         pass
 
-    def _readError(self, process: StrPopen):
-        if process.stderr is None:
+    def _readError(self, process: AnyPopen):
+        try:
+            for line in self._iterLines(process.stderr, isError=True):
+                self.processError(line)
+        finally:
+            self.streamClosed(process)
+
+    def processError(self, line: str):
+        pass
+
+    def processFinished(self, process: AnyPopen):
+        """Called when all streams of the process are closed."""
+
+
+class BinaryOutputReader(OutputReader):
+    """Pass output without decoding, the process must be opened with `binary=True`.
+
+    Chunks are read by `readinto` to a buffer reused by next reads,
+    so hooks get `memoryview`, which is valid only during the call.
+    With `decodeLines`, chunks are also decoded to lines
+    and passed to `processOutput` and `processError`.
+    """
+
+    BINARY = True
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        process: BytesPopen,
+        *,
+        chunkSize: int = CHUNK_SIZE,
+        decodeLines: bool = False,
+        encoding: str = 'UTF-8',
+        **kwargs,
+    ):
+        self.chunkSize = chunkSize
+        self.decodeLines = decodeLines
+        self.encoding = encoding
+        super().__init__(process, **kwargs)
+
+    def _startReading(self, process: AnyPopen):
+        if self.hub is not None:
+            msg = "Binary output cannot be read by a hub"
+            raise TypeError(msg)
+        super()._startReading(process)
+
+    def _readChunks(
+        self,
+        stream: IO[bytes] | IO[str] | None,
+        isError: bool,
+        processChunk: Callable[[memoryview], None],
+    ):
+        if stream is None:
             return
 
-        for line in process.stderr.readlines():
-            if not (strippedLine := line.strip()):
-                continue
-            self.processError(strippedLine)
+        buffer = bytearray(self.chunkSize)
+        view = memoryview(buffer)
+        readInto = self._getReadInto(stream)
+        processLine = self.processError if isError else self.processOutput
+        lineBuffer = None
+        if self.decodeLines:
+            lineBuffer = LineBuffer(self.maxLineLength, self.encoding)
+
+        while size := readInto(buffer):
+            chunk = view[:size]
+            if self.stats is not None:
+                self.stats.addRead(isError, size, buffer.count(b'\n', 0, size))
+            processChunk(chunk)
+            if lineBuffer is not None:
+                for line in lineBuffer.feed(chunk):
+                    processLine(line)
+
+        if lineBuffer is not None:
+            for line in lineBuffer.flush():
+                processLine(line)
+
+    @staticmethod
+    def _getReadInto(
+        stream: IO[bytes] | IO[str],
+    ) -> Callable[[bytearray], int | None]:
+        """Return method reading available data without waiting for a full buffer."""
+        match stream:
+            case BufferedIOBase():
+                return stream.readinto1
+            case RawIOBase():
+                return stream.readinto
+            case _:
+                msg = f"Unsupported binary stream {type(stream)}, open with binary=True"
+                raise TypeError(msg)
 
-    def processError(self, line: str):
+    def _readOutput(self, process: AnyPopen):
+        try:
+            self._readChunks(process.stdout, False, self.processOutputChunk)
+        finally:
+            self.streamClosed(process)
+
+    def processOutputChunk(self, chunk: memoryview):
         pass
 
+    def _readError(self, process: AnyPopen):
+        try:
+            self._readChunks(process.stderr, True, self.processErrorChunk)
+        finally:
+            self.streamClosed(process)
+
+    def processErrorChunk(self, chunk: memoryview):
+        pass
+
+
+class ProcessLoggerAdapter(logging.LoggerAdapter):
+    """Add pid of the process to messages and as `pid` attribute of records."""
+
+    def __init__(self, logger: logging.Logger, pid: int):
+        super().__init__(logger, {'pid': pid})
+        self.pid = pid
+
+    def process(self, msg, kwargs):
+        msg, kwargs = super().process(msg, kwargs)
+        return f"[{self.pid}] {msg}", kwargs
+
+
+class _ReaderLogger(logging.Logger):
+    """Logger not registered in `logging`, so it can be released.
+
+    `logging.disable` and level changes clear cached level checks
+    only of registered loggers, so checks of this logger are not cached.
+    """
+
+    def isEnabledFor(self, level: int) -> bool:
+        if self.disabled or self.manager.disable >= level:
+            return False
+        return level >= self.getEffectiveLevel()
+
+
+_readerLoggersLock = Lock()
+_readerLoggers: weakref.WeakValueDictionary[tuple, logging.Logger] = (
+    weakref.WeakValueDictionary()
+)
+
+
+def getReaderLogger(
+    name: str, handlers: Iterable[logging.Handler] = (), *, useQueue: bool = False
+) -> logging.Logger:
+    """Return logger shared by all readers with the same handlers.
+
+    Loggers with handlers are not registered by `logging.getLogger`,
+    so they are released with the last reader using them,
+    and their number does not depend on the number of processes.
+    """
+    handlers = tuple(handlers)
+    key = (name, handlers, useQueue)
+    with _readerLoggersLock:
+        if (log := _readerLoggers.get(key)) is not None:
+            return log
+
+        parent = logging.getLogger(name)
+        if not handlers and not useQueue:
+            log = parent
+        else:
+            log = _ReaderLogger(f'{name}.handlers')
+            log.parent = parent
+            log.propagate = not useQueue
+            for h in (getQueueHandler(handlers, parent),) if useQueue else handlers:
+                log.addHandler(h)
+
+        log.setLevel(logging.DEBUG)
+        _readerLoggers[key] = log
+        return log
+
 
 class OutputReaderLogger(OutputReader):
     def __init__(
-        self, process: StrPopen, logHandlers: Iterable[logging.Handler] = (), **kwargs
+        self,
+        process: StrPopen,
+        logHandlers: Iterable[logging.Handler] = (),
+        *,
+        batch: LogBatchConfig | None = None,
+        useQueue: bool = False,
+        **kwargs,
     ):
-        self.log = logging.getLogger(f'{__name__}.{type(self).__name__}.{process.pid}')
-        self.log.setLevel(logging.DEBUG)
-        for h in list(self.log.handlers):
-            self.log.removeHandler(h)
-        for h in logHandlers:
-            self.log.addHandler(h)
+        """Log output of the process.
+
+        :param batch: If set, lines are logged in chunks, see `LineBatcher`.
+        :param useQueue: Handle records in a listener thread,
+            instead of the thread reading the output.
+        """
+        name = f'{__name__}.{type(self).__name__}'
+        self.log = ProcessLoggerAdapter(
+            getReaderLogger(name, logHandlers, useQueue=useQueue), process.pid
+        )
 
-        super().__init__(process, **kwargs)
+        self._outputBatcher: LineBatcher | None = None
+        self._errorBatcher: LineBatcher | None = None
+        if batch is not None:
+            self._outputBatcher = LineBatcher(self.log.debug, batch)
+            self._errorBatcher = LineBatcher(self.log.error, batch)
 
-    def _readOutput(self, process: StrPopen):
-        super()._readOutput(process)
-        self.log.info(f"Process finished {process.pid=} {process.returncode=}")
+        super().__init__(process, **kwargs)
 
     def processOutput(self, line: str):
-        self.log.debug(line)
+        if self._outputBatcher is None:
+            self.log.debug(line)
+        else:
+            self._outputBatcher.add(line)
 
     def processError(self, line: str):
-        self.log.error(line)
+        if self._errorBatcher is None:
+            self.log.error(line)
+        else:
+            self._errorBatcher.add(line)
+
+    def processFinished(self, process: AnyPopen):
+        if self._outputBatcher is not None and self._errorBatcher is not None:
+            self._outputBatcher.flush()
+            self._errorBatcher.flush()
+        self.log.info(f"Process finished {process.pid=} {process.returncode=}")
 
 
 class PermissionFixReader(OutputReaderLogger):
+    """Add execute permission to files reported by the process and relaunch it.
+
+    Files are collected while the process is running,
+    then all of them are fixed and the process is relaunched once.
+    """
+
     PERMISSION_DENIED = re.compile('(?:[^:]+:)* ?([^:]+): Permission denied')
     """Tested patterns:
     /bin/sh: 1: ./script.sh: Permission denied
     """
+    MAX_RETRIES = 1
+
+    def __init__(self, process: StrPopen, *, maxRetries: int = MAX_RETRIES, **kwargs):
+        self.maxRetries = maxRetries
+        self.retries = 0
+        self._deniedFiles: dict[Path, None] = {}
+        self._fixedFiles: set[Path] = set()
+        super().__init__(process, **kwargs)
 
     def processError(self, line: str):
         if (match := self.PERMISSION_DENIED.match(line)) is None:
+            super().processError(line)
             return
 
         if (fileWithoutPermission := match.group(1)) is None:
             self.log.error("Cannot find file from pattern")
             return
 
-        if (workingDir := self._getWorkingDir()) is None:
-            workingDir = Path(fileWithoutPermission).parent
+        path = Path(fileWithoutPermission)
+        if not path.is_absolute() and (workingDir := self._getWorkingDir()):
+            path = Path(workingDir) / path
+
+        with self._streamLock:
+            if path not in self._fixedFiles:
+                self._deniedFiles[path] = None
 
-        self._fixPermission(f'cd "{workingDir}" ; chmod u+x "{fileWithoutPermission}"')
+    def processFinished(self, process: AnyPopen):
+        with self._streamLock:
+            deniedFiles = list(self._deniedFiles)
+            self._deniedFiles.clear()
+            self._fixedFiles.update(deniedFiles)
 
-        process = openProcessWrapper(self.originalProcess.args)
-        self.outputThread = self._startThread(process, target=self._readOutput)
-        self.stderrThread = self._startThread(process, target=self._readError)
+        if not deniedFiles:
+            super().processFinished(process)
+            return
+
+        if self.retries >= self.maxRetries:
+            self.log.error(f"Permission denied after {self.retries} retries")
+            super().processFinished(process)
+            return
+
+        if not [path for path in deniedFiles if self._fixPermission(path)]:
+            super().processFinished(process)
+            return
+
+        self.retries += 1
+        processWaiter.wait(process)
+        super().processFinished(process)
+        self._relaunch()
+
+    def _relaunch(self):
+        try:
+            process = relaunchProcess(self.originalProcess)
+        except Exception:
+            self.log.exception("Error when relaunching process")
+            return
+
+        self._startReading(process)
 
     def _getWorkingDir(self) -> str | None:
         match self.originalProcess.args:
@@ -172,13 +726,15 @@ class PermissionFixReader(OutputReaderLogger):
                 self.log.error("Cannot parse command")
                 return None
 
-    def _fixPermission(self, cmd: str):
-        permissionProcess = openProcessWrapper(cmd, shell=True)  # noqa: S604
-        stdout, stderr = permissionProcess.communicate()
-        if stderr:
-            self.log.error(stderr)
-        if stdout:
-            self.log.info(stdout)
+    def _fixPermission(self, path: Path) -> bool:
+        try:
+            path.chmod(path.stat().st_mode | stat.S_IXUSR)
+        except OSError:
+            self.log.exception(f"Cannot add execute permission to {path}")
+            return False
+
+        self.log.info(f"Added execute permission to {path}")
+        return True
 
 
 @overload
@@ -188,6 +744,9 @@ def runProcessAsync(
     shell=False,
     logHandlers: Iterable[logging.Handler] = (),
     reader: type[OutputReader] | None = PermissionFixReader,
+    maxLineLength: int = OutputReader.MAX_LINE_LENGTH,
+    hub: OutputReaderHub | None = None,
+    statsRegistry: ProcessStatsRegistry | None = None,
     **kwargs,
 ): ...
 
@@ -199,6 +758,9 @@ def runProcessAsync(
     shell=True,
     logHandlers: Iterable[logging.Handler] = (),
     reader: type[OutputReader] | None = PermissionFixReader,
+    maxLineLength: int = OutputReader.MAX_LINE_LENGTH,
+    hub: OutputReaderHub | None = None,
+    statsRegistry: ProcessStatsRegistry | None = None,
     **kwargs,
 ): ...
 
@@ -209,18 +771,230 @@ def runProcessAsync(
     shell=False,
     logHandlers: Iterable[logging.Handler] = (),
     reader: type[OutputReader] | None = PermissionFixReader,
+    maxLineLength: int = OutputReader.MAX_LINE_LENGTH,
+    hub: OutputReaderHub | None = None,
+    statsRegistry: ProcessStatsRegistry | None = None,
     **kwargs,
 ):
     if not cmd:
         return False
 
     try:
-        process = openProcessWrapper(cmd, *args, shell=shell, **kwargs)
+        binary = reader is not None and reader.BINARY
+        process = openProcessWrapper(cmd, *args, shell=shell, binary=binary, **kwargs)
     except Exception:
         logger.exception("Error when running process")
         return False
 
     if reader:
-        reader(process, logHandlers=logHandlers)
+        reader(
+            process,
+            logHandlers=logHandlers,
+            maxLineLength=maxLineLength,
+            hub=hub,
+            statsRegistry=statsRegistry,
+        )
 
     return True
+
+
+class _PoolJob(NamedTuple):
+    priority: int
+    sequence: int
+    future: Future[int]
+    args: tuple
+    kwargs: dict
+    timeout: float | None
+
+
+class ProcessPool:
+    """Run processes with a limited number of them running at the same time.
+
+    Waiting jobs are started in order of priority (lower value first),
+    then in order of submission. Each job gets a `Future` with return code,
+    or with `TimeoutExpired` if the process was killed after its timeout.
+
+    Example:
+    >>> with ProcessPool(maxRunning=2) as pool:
+    ...     futures = [pool.submit(['sleep', '1']) for _ in range(4)]
+    >>> [f.result() for f in futures]
+    [0, 0, 0, 0]
+    """
+
+    READ_TIMEOUT = 5.0
+    """How long to read output after the process exits,
+    it can be still open by its children."""
+
+    def __init__(
+        self,
+        maxRunning: int | None = None,
+        *,
+        reader: type[OutputReader] | None = OutputReaderLogger,
+        **readerKwargs,
+    ):
+        """Create pool, by default at most `os.cpu_count()` processes are running.
+
+        :param reader: Class used to read output of each process,
+            `readerKwargs` are passed to it.
+            If it is None, output is read and discarded.
+        """
+        self.maxRunning = maxRunning or os.cpu_count() or 1
+        self._reader = reader
+        self._readerKwargs = readerKwargs
+
+        self._lock = Lock()
+        self._counter = itertools.count()
+        self._queue: list[_PoolJob] = []
+        self._running: dict[Future[int], AnyPopen | None] = {}
+        self._cancelRequested: set[Future[int]] = set()
+        self._isShutdown = False
+
+    def submit(
+        self,
+        *args,
+        priority: int = 0,
+        timeout: float | None = None,
+        **kwargs,
+    ) -> Future[int]:
+        """Queue process, `args` and `kwargs` are passed to `openProcessWrapper`."""
+        future: Future[int] = Future()
+        job = _PoolJob(priority, next(self._counter), future, args, kwargs, timeout)
+        with self._lock:
+            if self._isShutdown:
+                msg = "Cannot submit a process after shutdown"
+                raise RuntimeError(msg)
+            heapq.heappush(self._queue, job)
+
+        self._startPending()
+        return future
+
+    def cancel(self, future: Future[int]) -> bool:
+        """Cancel waiting job or terminate the running process.
+
+        Result of a terminated process is its (negative) return code.
+        """
+        if future.cancel():
+            return True
+
+        with self._lock:
+            if future not in self._running:
+                return False
+            if (process := self._running[future]) is None:
+                self._cancelRequested.add(future)
+                return True
+
+        process.terminate()
+        return True
+
+    @property
+    def pendingCount(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+    @property
+    def runningCount(self) -> int:
+        with self._lock:
+            return len(self._running)
+
+    def shutdown(self, wait: bool = True, *, cancelPending: bool = False):
+        """Disallow new jobs, already queued jobs are run unless `cancelPending`."""
+        with self._lock:
+            self._isShutdown = True
+            pending: list[_PoolJob] = []
+            if cancelPending:
+                pending, self._queue = self._queue, pending
+
+        for job in pending:
+            job.future.cancel()
+
+        while wait:
+            with self._lock:
+                futures = [*self._running, *(job.future for job in self._queue)]
+            if not futures:
+                break
+            concurrent.futures.wait(futures)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_excInfo):
+        self.shutdown()
+
+    def _startPending(self):
+        while True:
+            with self._lock:
+                if len(self._running) >= self.maxRunning or not self._queue:
+                    return
+                job = heapq.heappop(self._queue)
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                self._running[job.future] = None
+
+            self._startJob(job)
+
+    def _startJob(self, job: _PoolJob):
+        try:
+            binary = self._reader is not None and self._reader.BINARY
+            process = openProcessWrapper(*job.args, binary=binary, **job.kwargs)
+        except Exception as e:
+            logger.exception("Error when running process")
+            self._finishJob(job, e)
+            return
+
+        with self._lock:
+            self._running[job.future] = process
+            cancelRequested = job.future in self._cancelRequested
+            self._cancelRequested.discard(job.future)
+        if cancelRequested:
+            process.terminate()
+
+        try:
+            reader = (
+                self._reader(process, **self._readerKwargs) if self._reader else None
+            )
+        except Exception as e:
+            logger.exception(f"Cannot read output of {process.pid=}")
+            process.kill()
+            process.communicate()
+            self._finishJob(job, e)
+            return
+
+        th = Thread(
+            target=self._waitForJob,
+            name=f"{process.args!r}._waitForJob",
+            args=(job, process, reader),
+        )
+        th.daemon = True
+        th.start()
+
+    def _waitForJob(
+        self, job: _PoolJob, process: AnyPopen, reader: OutputReader | None
+    ):
+        # with a reader the process is reaped by the waiter, keeping resource usage
+        wait = partial(processWaiter.wait, process) if reader else process.communicate
+        try:
+            wait(timeout=job.timeout)
+        except TimeoutExpired as e:
+            logger.warning(f"Killing process {process.pid=} after {job.timeout}s")
+            process.kill()
+            wait()
+            if reader and not reader.join(self.READ_TIMEOUT):
+                logger.warning(f"Output of killed process {process.pid=} is still open")
+            self._finishJob(job, e)
+            return
+
+        if reader and not reader.join(self.READ_TIMEOUT):
+            logger.warning(f"Output of process {process.pid=} is still open")
+        self._finishJob(job, process.wait())  # already exited, returns the code
+
+    def _finishJob(self, job: _PoolJob, result: int | BaseException):
+        with self._lock:
+            self._running.pop(job.future, None)
+            # cancel requested before the process failed to start
+            self._cancelRequested.discard(job.future)
+
+        if isinstance(result, BaseException):
+            job.future.set_exception(result)
+        else:
+            job.future.set_result(result)
+        self._startPending()
@@ -0,0 +1,184 @@
+"""Asyncio variant of `process_async`.
+
+All processes are supervised by a single event loop, so no thread
+is started per process, which matters with many concurrent processes.
+"""
+
+import asyncio
+import contextlib
+import logging
+import signal
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+from pyqt_utils.python.process_async import (
+    LineBuffer,
+    OutputReader,
+    ProcessLoggerAdapter,
+    createPreExecForParentDeath,
+    formatProcessArgs,
+    getReaderLogger,
+)
+
+logger = logging.getLogger(__name__)
+type AsyncProcess = asyncio.subprocess.Process
+
+
+class AsyncOutputReader:
+    """Same hooks as `OutputReader`, but lines are read by coroutines.
+
+    Output is read in chunks, so lines longer than `maxLineLength`
+    are passed to hooks in parts, instead of exceeding the `StreamReader` limit.
+    """
+
+    ENCODING = 'UTF-8'
+    READ_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        process: AsyncProcess,
+        args: str | list[str],
+        *,
+        maxLineLength: int = OutputReader.MAX_LINE_LENGTH,
+        **kwargs,
+    ):
+        self.originalProcess = process
+        self.args = args
+        self.maxLineLength = maxLineLength
+
+    async def run(self) -> int:
+        """Read both streams until they are closed, then wait for the process.
+
+        If a hook fails or the task is cancelled, reading of the other stream
+        is cancelled and the process is killed, so it is always waited for.
+        """
+        process = self.originalProcess
+        tasks = [
+            asyncio.ensure_future(self._readStream(process.stdout, self.processOutput)),
+            asyncio.ensure_future(self._readStream(process.stderr, self.processError)),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            await self._abort(tasks)
+            raise
+
+        returnCode = await process.wait()
+        self.processFinished(returnCode)
+        return returnCode
+
+    async def _abort(self, tasks: list[asyncio.Task[None]]):
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        process = self.originalProcess
+        if process.returncode is None:
+            with contextlib.suppress(ProcessLookupError):
+                process.kill()
+        await process.wait()
+
+    async def _readStream(
+        self, stream: asyncio.StreamReader | None, callback: Callable[[str], None]
+    ):
+        if stream is None:
+            return
+
+        buffer = LineBuffer(self.maxLineLength, self.ENCODING)
+        while data := await stream.read(self.READ_SIZE):
+            for line in buffer.feed(data):
+                callback(line)
+        for line in buffer.flush():
+            callback(line)
+
+    def processOutput(self, line: str):
+        pass
+
+    def processError(self, line: str):
+        pass
+
+    def processFinished(self, returnCode: int):
+        pass
+
+
+class AsyncOutputReaderLogger(AsyncOutputReader):
+    def __init__(
+        self,
+        process: AsyncProcess,
+        args: str | list[str],
+        logHandlers: Iterable[logging.Handler] = (),
+        **kwargs,
+    ):
+        name = f'{__name__}.{type(self).__name__}'
+        self.log = ProcessLoggerAdapter(getReaderLogger(name, logHandlers), process.pid)
+
+        super().__init__(process, args, **kwargs)
+
+    def processOutput(self, line: str):
+        self.log.debug(line)
+
+    def processError(self, line: str):
+        self.log.error(line)
+
+    def processFinished(self, returnCode: int):
+        self.log.info(f"Process finished {self.originalProcess.pid=} {returnCode=}")
+
+
+async def openProcessAsyncio(
+    cmd: str | list[str], *, shell=False, **kwargs
+) -> AsyncProcess:
+    """Start process with piped output, `cmd` is interpreted as in `Popen`."""
+    kwargs.setdefault('stdout', asyncio.subprocess.PIPE)
+    kwargs.setdefault('stderr', asyncio.subprocess.PIPE)
+
+    match cmd, shell:
+        case str() | Path(), True:
+            process = await asyncio.create_subprocess_shell(str(cmd), **kwargs)
+        case list(), True:
+            msg = "Shell command must be a string"
+            raise TypeError(msg)
+        case str() | Path(), False:
+            process = await asyncio.create_subprocess_exec(cmd, **kwargs)
+        case _:
+            process = await asyncio.create_subprocess_exec(*cmd, **kwargs)
+
+    logger.info(formatProcessArgs(cmd))
+    return process
+
+
+async def runProcessAsyncio(
+    cmd: str | list[str],
+    *,
+    shell=False,
+    logHandlers: Iterable[logging.Handler] = (),
+    reader: type[AsyncOutputReader] | None = AsyncOutputReaderLogger,
+    maxLineLength: int = OutputReader.MAX_LINE_LENGTH,
+    parentDeathSignal: signal.Signals | None = signal.SIGTERM,
+    **kwargs,
+) -> int | None:
+    """Run process and return its return code, or None if it cannot be started.
+
+    Unlike `runProcessAsync`, the child process is terminated by default
+    when this process exits, see `createPreExecForParentDeath`.
+    Remaining `kwargs` are passed to `asyncio.create_subprocess_exec`.
+    """
+    if not cmd:
+        return None
+
+    if reader is None:
+        kwargs.setdefault('stdout', asyncio.subprocess.DEVNULL)
+        kwargs.setdefault('stderr', asyncio.subprocess.DEVNULL)
+    if parentDeathSignal is not None:
+        kwargs.setdefault('preexec_fn', createPreExecForParentDeath(parentDeathSignal))
+
+    try:
+        process = await openProcessAsyncio(cmd, shell=shell, **kwargs)
+    except Exception:
+        logger.exception("Error when running process")
+        return None
+
+    if reader:
+        return await reader(
+            process, cmd, logHandlers=logHandlers, maxLineLength=maxLineLength
+        ).run()
+    return await process.wait()
@@ -0,0 +1,262 @@
+"""Resource usage and timing of child processes, see `OutputReader`."""
+
+import logging
+import os
+import resource
+import shlex
+import time
+import weakref
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from subprocess import Popen, TimeoutExpired
+from threading import Event, Lock, Thread
+from typing import Self
+
+logger = logging.getLogger(__name__)
+type UsageCallback = Callable[[resource.struct_rusage | None], None]
+
+
+@dataclass
+class ProcessStats:
+    """Timing and resource usage of a process.
+
+    `outputBytes` and `errorBytes` count bytes of binary and hub readers,
+    but decoded characters of text streams read by threads.
+    """
+
+    args: str
+    pid: int
+    startTime: float = field(default_factory=time.time)
+    """Unix time, when the process started."""
+    wallTime: float | None = None
+    returnCode: int | None = None
+    outputBytes: int = 0
+    outputLines: int = 0
+    errorBytes: int = 0
+    errorLines: int = 0
+    userTime: float | None = None
+    systemTime: float | None = None
+    maxRss: int | None = None
+    """Maximum resident set size in KiB."""
+    _startCounter: float = field(default_factory=time.perf_counter, repr=False)
+
+    @classmethod
+    def fromProcess(cls, process: Popen) -> Self:
+        match process.args:
+            case str() | bytes() | os.PathLike() as arg:
+                args = os.fsdecode(arg)
+            case args:
+                args = shlex.join(os.fsdecode(a) for a in args)
+
+        age = _processAge(process.pid)
+        return cls(
+            args,
+            process.pid,
+            startTime=time.time() - age,
+            _startCounter=time.perf_counter() - age,
+        )
+
+    @property
+    def program(self) -> str:
+        try:
+            parts = shlex.split(self.args)
+        except ValueError:
+            parts = self.args.split()
+        return Path(parts[0]).name if parts else ''
+
+    def addRead(self, isError: bool, size: int, lines: int):
+        if isError:
+            self.errorBytes += size
+            self.errorLines += lines
+        else:
+            self.outputBytes += size
+            self.outputLines += lines
+
+    def finish(self, process: Popen, usage: resource.struct_rusage | None):
+        """Record return code and resource usage of the exited process."""
+        if usage is not None:
+            self.userTime = usage.ru_utime
+            self.systemTime = usage.ru_stime
+            self.maxRss = usage.ru_maxrss
+        self.returnCode = process.returncode
+        self.wallTime = time.perf_counter() - self._startCounter
+
+
+def _processAge(pid: int) -> float:
+    """Return seconds since the process started, 0 if it is not known (not Linux)."""
+    try:
+        procStat = Path(f'/proc/{pid}/stat').read_text()
+        # fields after the name, which can contain spaces, the 22nd is start time
+        startTicks = int(procStat.rpartition(')')[2].split()[19])
+        bootTime = time.clock_gettime(time.CLOCK_BOOTTIME)
+        return max(bootTime - startTicks / os.sysconf('SC_CLK_TCK'), 0.0)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0.0
+
+
+_usages: weakref.WeakKeyDictionary[Popen, resource.struct_rusage] = (
+    weakref.WeakKeyDictionary()
+)
+"""Resource usage of processes reaped by `pollWithUsage`."""
+
+
+def pollWithUsage(process: Popen) -> tuple[bool, resource.struct_rusage | None]:
+    """Check, if the process exited, without blocking as `Popen.poll` does.
+
+    Return whether the process exited and its resource usage.
+    The process is reaped and its usage is kept, so next calls return it too.
+    The process must not be reaped elsewhere (`Popen.wait`, `poll`, `communicate`),
+    use `processWaiter.wait` instead, otherwise usage is not available.
+    """
+    if process.returncode is not None:
+        return True, _usages.get(process)
+    try:
+        pid, status, usage = os.wait4(process.pid, os.WNOHANG)
+    except ChildProcessError:
+        process.wait()  # reaped by `Popen`, which already set the return code
+        return True, None
+
+    if pid == 0:
+        return False, None
+    _usages[process] = usage
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return True, usage
+
+
+class ProcessWaiter:
+    """Single thread waiting for exit of processes to collect their resource usage.
+
+    Processes are polled, so threads reading the output are never blocked
+    by a process, which closed its output, but is still running.
+    Callbacks are called by the waiter thread.
+    This is the only place, where processes of readers and `ProcessPool` are reaped.
+    """
+
+    TICK = 0.02
+
+    def __init__(self):
+        self._lock = Lock()
+        self._waiting: list[tuple[Popen, UsageCallback]] = []
+        self._thread: Thread | None = None
+
+    def add(self, process: Popen, callback: UsageCallback):
+        with self._lock:
+            self._waiting.append((process, callback))
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name=type(self).__name__)
+                self._thread.daemon = True
+                self._thread.start()
+
+    def wait(self, process: Popen, timeout: float | None = None) -> int:
+        """Block until the process exits and return its return code.
+
+        Unlike `Popen.wait`, the process is reaped by the waiter thread,
+        so its resource usage is not lost.
+        It must not be called by callbacks, before the process exits.
+
+        :raises TimeoutExpired: If the process is still running after the timeout.
+        """
+        if process.returncode is not None:
+            return process.returncode
+
+        exited = Event()
+        self.add(process, lambda _usage: exited.set())
+        if exited.wait(timeout):
+            return process.wait()  # already reaped, returns the code
+        raise TimeoutExpired(process.args, timeout or 0.0)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not (waiting := self._waiting.copy()):
+                    self._thread = None
+                    return
+
+            for process, callback in waiting:
+                try:
+                    isExited, usage = pollWithUsage(process)
+                except Exception:
+                    logger.exception(f"Cannot wait for process {process.pid=}")
+                    isExited, usage = True, None
+                if not isExited:
+                    continue
+
+                with self._lock:
+                    self._waiting.remove((process, callback))
+                try:
+                    callback(usage)
+                except Exception:
+                    logger.exception(f"Error in callback of process {process.pid=}")
+
+            time.sleep(self.TICK)
+
+
+processWaiter = ProcessWaiter()
+
+
+@dataclass
+class ProgramStats:
+    program: str
+    count: int = 0
+    failures: int = 0
+    wallTime: float = 0.0
+    maxWallTime: float = 0.0
+    userTime: float = 0.0
+    systemTime: float = 0.0
+    maxRss: int = 0
+    outputBytes: int = 0
+    errorBytes: int = 0
+    lines: int = 0
+
+    def add(self, stats: ProcessStats):
+        self.count += 1
+        self.failures += stats.returnCode != 0
+        self.wallTime += stats.wallTime or 0.0
+        self.maxWallTime = max(self.maxWallTime, stats.wallTime or 0.0)
+        self.userTime += stats.userTime or 0.0
+        self.systemTime += stats.systemTime or 0.0
+        self.maxRss = max(self.maxRss, stats.maxRss or 0)
+        self.outputBytes += stats.outputBytes
+        self.errorBytes += stats.errorBytes
+        self.lines += stats.outputLines + stats.errorLines
+
+
+class ProcessStatsRegistry:
+    """Collect stats of finished processes, aggregated by the program name."""
+
+    def __init__(self, keepLast: int = 1000):
+        self._lock = Lock()
+        self._programs: dict[str, ProgramStats] = {}
+        self.recent: deque[ProcessStats] = deque(maxlen=keepLast)
+
+    def add(self, stats: ProcessStats):
+        with self._lock:
+            self.recent.append(stats)
+            if (programStats := self._programs.get(stats.program)) is None:
+                programStats = self._programs[stats.program] = ProgramStats(
+                    stats.program
+                )
+            programStats.add(stats)
+
+    def summary(self) -> list[ProgramStats]:
+        """Return stats of programs, which took the most time first."""
+        with self._lock:
+            programs = list(self._programs.values())
+        return sorted(programs, key=lambda p: p.wallTime, reverse=True)
+
+    def format(self, top: int = 10) -> str:
+        lines = [
+            f"{p.program}: count={p.count} failures={p.failures}"
+            f" wall={p.wallTime:.3f}s max={p.maxWallTime:.3f}s"
+            f" user={p.userTime:.3f}s sys={p.systemTime:.3f}s"
+            f" maxRss={p.maxRss}KiB lines={p.lines}"
+            for p in self.summary()[:top]
+        ]
+        return '\n'.join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._programs.clear()
+            self.recent.clear()
@@ -0,0 +1,141 @@
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator, Sequence
+
+_MAX_CHAR = chr(0x10FFFF)
+_INFIX_SEPARATOR = '\0'
+
+
+class SortedStringIndex(Sequence[str]):
+    """Sorted, unique strings with fast exact, prefix and infix lookup.
+
+    Exact and prefix lookups use `bisect`, so they are `O(log n + k)`.
+    Infix lookup scans a single joined string by `str.find`,
+    which is linear, but done in C without creating python objects per value.
+    A case-insensitive index can be searched case-sensitively by `matchCase`,
+    then candidates found case-insensitively are compared.
+
+    Example:
+    >>> index = SortedStringIndex(['beta', 'Alpha', 'alphabet'], caseSensitive=False)
+    >>> list(index)
+    ['Alpha', 'alphabet', 'beta']
+    >>> [index[i] for i in index.prefixRange('ALP')]
+    ['Alpha', 'alphabet']
+    >>> [index[i] for i in index.infixMatches('bet')]
+    ['alphabet', 'beta']
+    """
+
+    def __init__(self, values: Iterable[str] = (), *, caseSensitive: bool = True):
+        self.caseSensitive = caseSensitive
+        self._values = sorted(set(values))
+        if caseSensitive:
+            self._keys = self._values
+        else:
+            self._values.sort(key=str.casefold)
+            self._keys = [v.casefold() for v in self._values]
+        self._joinedKeys: str | None = None
+        self._offsets: list[int] = []
+
+    def normalize(self, text: str) -> str:
+        return text if self.caseSensitive else text.casefold()
+
+    def find(self, text: str, *, matchCase: bool = False) -> int | None:
+        """Return position of the first value equal to text (respecting case mode).
+
+        :param matchCase: Compare case also in a case-insensitive index.
+        """
+        key = self.normalize(text)
+        pos = bisect_left(self._keys, key)
+        while pos < len(self._keys) and self._keys[pos] == key:
+            if not matchCase or self._values[pos] == text:
+                return pos
+            pos += 1
+        return None
+
+    def prefixRange(self, prefix: str) -> range:
+        """Return positions of values starting with the prefix."""
+        key = self.normalize(prefix)
+        first = bisect_left(self._keys, key)
+        if (successor := self._successor(key)) is None:
+            return range(first, len(self._keys))
+        return range(first, bisect_left(self._keys, successor, first))
+
+    @staticmethod
+    def _successor(prefix: str) -> str | None:
+        """Return the smallest string greater than all strings with the prefix."""
+        if not (stripped := prefix.rstrip(_MAX_CHAR)):
+            return None
+        return stripped[:-1] + chr(ord(stripped[-1]) + 1)
+
+    def infixMatches(self, text: str) -> list[int]:
+        """Return positions of values containing the text."""
+        key = self.normalize(text)
+        if not key:
+            return list(range(len(self._keys)))
+        if _INFIX_SEPARATOR in key:
+            return [i for i, k in enumerate(self._keys) if key in k]
+
+        joinedKeys, offsets = self._getJoinedKeys()
+        result: list[int] = []
+        pos = joinedKeys.find(key)
+        while pos != -1:
+            valueIndex = bisect_right(offsets, pos) - 1
+            result.append(valueIndex)
+            nextValueIndex = valueIndex + 1
+            if nextValueIndex >= len(offsets):
+                break
+            pos = joinedKeys.find(key, offsets[nextValueIndex])
+        return result
+
+    def _getJoinedKeys(self) -> tuple[str, list[int]]:
+        if self._joinedKeys is None:
+            offsets = []
+            pos = 0
+            for k in self._keys:
+                offsets.append(pos)
+                pos += len(k) + len(_INFIX_SEPARATOR)
+            self._offsets = offsets
+            self._joinedKeys = _INFIX_SEPARATOR.join(self._keys)
+        return self._joinedKeys, self._offsets
+
+    def matches(
+        self, text: str, *, infix: bool = False, matchCase: bool = False
+    ) -> list[str]:
+        if self._isCaseFiltered(matchCase):
+            return list(self._caseMatches(text, infix=infix))
+        if infix:
+            return [self._values[i] for i in self.infixMatches(text)]
+        prefixRange = self.prefixRange(text)
+        return self._values[prefixRange.start : prefixRange.stop]
+
+    def hasMatch(
+        self, text: str, *, infix: bool = False, matchCase: bool = False
+    ) -> bool:
+        if self._isCaseFiltered(matchCase):
+            return any(True for _ in self._caseMatches(text, infix=infix))
+        if not infix:
+            return bool(self.prefixRange(text))
+
+        key = self.normalize(text)
+        if _INFIX_SEPARATOR in key:
+            return bool(self.infixMatches(text))
+        return key in self._getJoinedKeys()[0]
+
+    def _isCaseFiltered(self, matchCase: bool) -> bool:
+        return matchCase and not self.caseSensitive
+
+    def _caseMatches(self, text: str, *, infix: bool) -> Iterator[str]:
+        """Yield case-sensitive matches of case-insensitive candidates."""
+        if infix:
+            candidates = (self._values[i] for i in self.infixMatches(text))
+            return (v for v in candidates if text in v)
+        candidates = (self._values[i] for i in self.prefixRange(text))
+        return (v for v in candidates if v.startswith(text))
+
+    def __contains__(self, text: object) -> bool:
+        return isinstance(text, str) and self.find(text) is not None
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+    def __len__(self):
+        return len(self._values)
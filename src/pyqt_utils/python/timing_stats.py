@@ -0,0 +1,135 @@
+"""Aggregated execution time of functions, see `timeDecFactory`."""
+
+import logging
+import time
+from collections.abc import Callable
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+_BUCKETS = 64
+"""Bucket `i` contains durations in range `[2 ** (i - 1), 2 ** i)` ns."""
+
+
+class TimingStats:
+    """Count, total, min, max and a histogram of durations in nanoseconds.
+
+    Percentiles are estimated from the histogram of power of 2 buckets,
+    so their relative error is below 2x, but memory is constant.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.totalNs = 0
+        self.minNs = 0
+        self.maxNs = 0
+        self._buckets = [0] * _BUCKETS
+
+    def add(self, durationNs: int):
+        if not self.count or durationNs < self.minNs:
+            self.minNs = durationNs
+        self.maxNs = max(self.maxNs, durationNs)
+        self.count += 1
+        self.totalNs += durationNs
+        self._buckets[min(durationNs.bit_length(), _BUCKETS - 1)] += 1
+
+    @property
+    def meanNs(self) -> float:
+        return self.totalNs / self.count if self.count else 0.0
+
+    def percentileNs(self, percent: float) -> float:
+        """Estimate percentile by linear interpolation inside the bucket."""
+        if not self.count:
+            return 0.0
+
+        rank = percent / 100 * self.count
+        seen = 0
+        for bucket, bucketCount in enumerate(self._buckets):
+            if bucketCount and seen + bucketCount >= rank:
+                low = 1 << bucket >> 1
+                high = 1 << bucket
+                value = low + (high - low) * (rank - seen) / bucketCount
+                return min(max(value, self.minNs), self.maxNs)
+            seen += bucketCount
+        return float(self.maxNs)
+
+    def copy(self) -> 'TimingStats':
+        result = TimingStats(self.name)
+        result.__dict__.update(self.__dict__)
+        result._buckets = self._buckets.copy()
+        return result
+
+    def format(self) -> str:
+        ms = 1e-6
+        return (
+            f"{self.name}: count={self.count} total={self.totalNs * ms:.3f}ms"
+            f" mean={self.meanNs * ms:.4f}ms min={self.minNs * ms:.4f}ms"
+            f" p50={self.percentileNs(50) * ms:.4f}ms"
+            f" p99={self.percentileNs(99) * ms:.4f}ms"
+            f" max={self.maxNs * ms:.4f}ms"
+        )
+
+
+class TimingRegistry:
+    """Collect `TimingStats` per function.
+
+    If `reportInterval` (in seconds) is set, all stats are logged
+    by a call, which is recorded after the interval passes.
+    """
+
+    def __init__(
+        self,
+        reportInterval: float | None = None,
+        reportLogger: logging.Logger = logger,
+        reportLevel: int = logging.INFO,
+    ):
+        self.reportLogger = reportLogger
+        self.reportLevel = reportLevel
+        self._lock = Lock()
+        self._stats: dict[Callable, TimingStats] = {}
+        self._reportIntervalNs: int | None = None
+        self._nextReportNs = 0
+        self.setReportInterval(reportInterval)
+
+    def setReportInterval(self, seconds: float | None):
+        with self._lock:
+            if seconds is None:
+                self._reportIntervalNs = None
+                return
+            self._reportIntervalNs = int(seconds * 1e9)
+            self._nextReportNs = time.perf_counter_ns() + self._reportIntervalNs
+
+    def record(self, fun: Callable, durationNs: int, nowNs: int = 0):
+        """Add duration of the function call, `nowNs` is used for periodic report."""
+        with self._lock:
+            if (stats := self._stats.get(fun)) is None:
+                name = f'{fun.__module__}.{fun.__qualname__}'
+                stats = self._stats[fun] = TimingStats(name)
+            stats.add(durationNs)
+
+            if self._reportIntervalNs is None or nowNs < self._nextReportNs:
+                return
+            self._nextReportNs = nowNs + self._reportIntervalNs
+
+        self.report()
+
+    def snapshot(self) -> list[TimingStats]:
+        """Return copy of stats, the most time-consuming functions first."""
+        with self._lock:
+            stats = [s.copy() for s in self._stats.values()]
+        return sorted(stats, key=lambda s: s.totalNs, reverse=True)
+
+    def dump(self) -> str:
+        return '\n'.join(s.format() for s in self.snapshot())
+
+    def report(self):
+        if self.reportLogger.isEnabledFor(self.reportLevel):
+            self.reportLogger.log(self.reportLevel, f"Timing stats:\n{self.dump()}")
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+timingRegistry = TimingRegistry()
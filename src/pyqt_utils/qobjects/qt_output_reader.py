@@ -0,0 +1,213 @@
+import logging
+import os
+import resource
+from collections.abc import Callable
+from functools import partial
+from io import TextIOWrapper
+
+from PyQt5.QtCore import QObject, QSocketNotifier, QTimer, pyqtSignal
+
+from pyqt_utils.python.process_async import (
+    AnyPopen,
+    LineBuffer,
+    OutputReader,
+    StrPopen,
+    openProcessWrapper,
+)
+from pyqt_utils.python.process_stats import (
+    ProcessStats,
+    ProcessStatsRegistry,
+    processWaiter,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class QtOutputReader(OutputReader, QObject):
+    """Read output of the process in the Qt event loop, without threads.
+
+    Pipes are watched by `QSocketNotifier`, lines are collected
+    and emitted in batches at most once per `flushInterval` ms,
+    so signals can be connected directly to widgets.
+    """
+
+    outputReceived = pyqtSignal(list)
+    errorReceived = pyqtSignal(list)
+    finished = pyqtSignal(int)
+    """Emitted with the return code, after all output is emitted."""
+    _exited = pyqtSignal(object, object)
+    """Pass exit of the process from `processWaiter` thread to the Qt thread."""
+    _reaped = pyqtSignal(int)
+    """Pass the return code from `processWaiter` thread to `finished`."""
+
+    READ_SIZE = 64 * 1024
+    FLUSH_INTERVAL = 100
+    MAX_BATCH_SIZE = 10_000
+
+    def __init__(
+        self,
+        process: StrPopen,
+        parent: QObject | None = None,
+        *,
+        flushInterval: int = FLUSH_INTERVAL,
+        maxBatchSize: int = MAX_BATCH_SIZE,
+        **kwargs,
+    ):
+        """Start reading output of the process.
+
+        :param flushInterval: Minimal time between signals in milliseconds.
+        :param maxBatchSize: Number of lines, which causes an immediate flush.
+        """
+        self._maxBatchSize = maxBatchSize
+        self._outputLines: list[str] = []
+        self._errorLines: list[str] = []
+        self._notifiers: list[QSocketNotifier] = []
+        kwargs.pop('hub', None)
+        # not cooperative, QObject would call `OutputReader.__init__` without process
+        QObject.__init__(self, parent)
+
+        self._flushTimer = QTimer(self)
+        self._flushTimer.setInterval(flushInterval)
+        self._flushTimer.timeout.connect(self.flush)
+        self._exited.connect(super()._processExited)
+        self._reaped.connect(self.finished)
+        OutputReader.__init__(self, process, **kwargs)
+
+    def _startReading(self, process: AnyPopen):
+        with self._streamLock:
+            self._openStreams += 2
+            self._finished.clear()
+        if self.statsRegistry is not None:
+            self.stats = ProcessStats.fromProcess(process)
+
+        for stream, callback in (
+            (process.stdout, self.processOutput),
+            (process.stderr, self.processError),
+        ):
+            if stream is None:
+                self.streamClosed(process)
+                continue
+            if not isinstance(stream, TextIOWrapper):
+                msg = "Binary output cannot be read by QtOutputReader"
+                raise TypeError(msg)
+
+            fd = stream.fileno()
+            os.set_blocking(fd, False)
+            buffer = LineBuffer(self.maxLineLength, stream.encoding)
+            # stubs declare `voidptr`, but the descriptor is passed as int
+            notifier = QSocketNotifier(
+                fd,  # type: ignore[arg-type]
+                QSocketNotifier.Type.Read,
+                self,
+            )
+            notifier.activated.connect(
+                partial(self._read, process, stream, buffer, callback, notifier)
+            )
+            self._notifiers.append(notifier)
+
+    def _read(
+        self,
+        process: AnyPopen,
+        stream: TextIOWrapper,
+        buffer: LineBuffer,
+        callback: Callable[[str], None],
+        notifier: QSocketNotifier,
+        _fd: int,
+    ):
+        try:
+            data = os.read(stream.fileno(), self.READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            logger.exception(f"Cannot read output of {process.pid=}")
+            data = b''
+
+        if data:
+            if self.stats is not None:
+                isError = stream is process.stderr
+                self.stats.addRead(isError, len(data), data.count(b'\n'))
+            lines = buffer.feed(data)
+        else:
+            notifier.setEnabled(False)
+            self._notifiers.remove(notifier)
+            notifier.deleteLater()
+            lines = buffer.flush()
+
+        for line in lines:
+            callback(line)
+
+        if not data:
+            stream.close()
+            self.streamClosed(process)
+
+    def _processExited(self, process: AnyPopen, usage: resource.struct_rusage | None):
+        self._exited.emit(process, usage)
+
+    def processOutput(self, line: str):
+        self._outputLines.append(line)
+        self._scheduleFlush()
+
+    def processError(self, line: str):
+        self._errorLines.append(line)
+        self._scheduleFlush()
+
+    def _scheduleFlush(self):
+        if len(self._outputLines) + len(self._errorLines) >= self._maxBatchSize:
+            self.flush()
+        elif not self._flushTimer.isActive():
+            self._flushTimer.start()
+
+    def flush(self):
+        """Emit all collected lines."""
+        self._flushTimer.stop()
+        if self._outputLines:
+            lines, self._outputLines = self._outputLines, []
+            self.outputReceived.emit(lines)
+        if self._errorLines:
+            lines, self._errorLines = self._errorLines, []
+            self.errorReceived.emit(lines)
+
+    def processFinished(self, process: AnyPopen):
+        """Emit remaining lines and `finished`, when the process exits."""
+        self.flush()
+        if process.returncode is not None:
+            self.finished.emit(process.returncode)
+            return
+        # reaped by the waiter only, so its resource usage is not lost
+        processWaiter.add(process, lambda _usage: self._reaped.emit(process.returncode))
+
+
+def runProcessQt(
+    cmd: str | list[str],
+    *args,
+    shell=False,
+    parent: QObject | None = None,
+    reader: type[QtOutputReader] = QtOutputReader,
+    maxLineLength: int = QtOutputReader.MAX_LINE_LENGTH,
+    flushInterval: int = QtOutputReader.FLUSH_INTERVAL,
+    maxBatchSize: int = QtOutputReader.MAX_BATCH_SIZE,
+    statsRegistry: ProcessStatsRegistry | None = None,
+    **kwargs,
+) -> QtOutputReader | None:
+    """Start process and return reader, which emits its output in the Qt thread.
+
+    Return None if the process cannot be started.
+    Remaining `kwargs` are passed to `openProcessWrapper`.
+    """
+    if not cmd:
+        return None
+
+    try:
+        process = openProcessWrapper(cmd, *args, shell=shell, **kwargs)
+    except Exception:
+        logger.exception("Error when running process")
+        return None
+
+    return reader(
+        process,
+        parent,
+        maxLineLength=maxLineLength,
+        flushInterval=flushInterval,
+        maxBatchSize=maxBatchSize,
+        statsRegistry=statsRegistry,
+    )
@@ -2,26 +2,54 @@ from collections.abc import Iterable
 
 from PyQt5.QtGui import QValidator
 
+from pyqt_utils.python.sorted_index import SortedStringIndex
+
 
 class SubstringValidator(QValidator):
-    def __init__(self, possibleValues: Iterable[str] = (), parent=None):
+    def __init__(
+        self,
+        possibleValues: Iterable[str] | SortedStringIndex = (),
+        parent=None,
+        *,
+        caseSensitive: bool = True,
+        infix: bool = False,
+    ):
+        """Accept only possible values, intermediate state is allowed for prefixes.
+
+        :param possibleValues: Values or an index, which may be shared.
+        :param caseSensitive: Case mode for the index created from values,
+            a shared case-insensitive index is searched case-sensitively too.
+        :param infix: Treat text as intermediate, when it is inside any value.
+        """
         super().__init__(parent)
-        self._possibleValues: list[str] = []
+        self._caseSensitive = caseSensitive
+        self._infix = infix
+        self._index = SortedStringIndex()
         self.setPossibleValues(possibleValues)
 
-    def setPossibleValues(self, possibleValues: Iterable[str] = ()):
-        self._possibleValues = list(possibleValues)
+    def setPossibleValues(self, possibleValues: Iterable[str] | SortedStringIndex = ()):
+        if isinstance(possibleValues, SortedStringIndex):
+            self._index = possibleValues
+        else:
+            self._index = SortedStringIndex(
+                possibleValues, caseSensitive=self._caseSensitive
+            )
 
     def validate(self, inputText: str, pos: int):
-        if inputText in self._possibleValues:
+        matchCase = self._caseSensitive
+        if self._index.find(inputText, matchCase=matchCase) is not None:
             return QValidator.Acceptable, inputText, pos
 
-        if self._getRemainingOptions(inputText):
+        if self._index.hasMatch(inputText, infix=self._infix, matchCase=matchCase):
             return QValidator.Intermediate, inputText, pos
 
         return QValidator.Invalid, inputText, pos
 
     def fixup(self, inputText: str) -> str:
+        exact = self._index.find(inputText, matchCase=self._caseSensitive)
+        if exact is not None:
+            return self._index[exact]
+
         match self._getRemainingOptions(inputText):
             case [onlyOne]:
                 return onlyOne
@@ -29,5 +57,6 @@ class SubstringValidator(QValidator):
                 return inputText
 
     def _getRemainingOptions(self, inputText: str) -> list[str]:
-        size = len(inputText)
-        return [p for p in self._possibleValues if p[:size] == inputText]
+        return self._index.matches(
+            inputText, infix=self._infix, matchCase=self._caseSensitive
+        )
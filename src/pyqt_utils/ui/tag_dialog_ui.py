@@ -28,10 +28,11 @@ class Ui_TagDialog(object):
         self.label_4 = QtWidgets.QLabel(self.layoutWidget)
         self.label_4.setObjectName("label_4")
         self.verticalLayout.addWidget(self.label_4)
-        self.possibleTagsWidget = QtWidgets.QListWidget(self.layoutWidget)
+        self.possibleTagsWidget = QtWidgets.QListView(self.layoutWidget)
         self.possibleTagsWidget.setDragEnabled(True)
         self.possibleTagsWidget.setDragDropMode(QtWidgets.QAbstractItemView.DragOnly)
         self.possibleTagsWidget.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.possibleTagsWidget.setUniformItemSizes(True)
         self.possibleTagsWidget.setObjectName("possibleTagsWidget")
         self.verticalLayout.addWidget(self.possibleTagsWidget)
         self.horizontalLayout_2 = QtWidgets.QHBoxLayout()
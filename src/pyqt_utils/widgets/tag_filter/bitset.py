@@ -0,0 +1,113 @@
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+
+
+class TagVocabulary:
+    """Map tag names to bit positions, so a set of tags can be stored as `int`."""
+
+    def __init__(self, tags: Iterable[str] = ()):
+        self._bits: dict[str, int] = {}
+        self._tags: list[str] = []
+        for t in tags:
+            self.intern(t)
+
+    def intern(self, tag: str) -> int:
+        """Return bit position of the tag, new position is assigned if needed."""
+        if (bit := self._bits.get(tag)) is None:
+            bit = self._bits[tag] = len(self._tags)
+            self._tags.append(tag)
+        return bit
+
+    def bit(self, tag: str) -> int | None:
+        return self._bits.get(tag)
+
+    def encode(self, tags: Iterable[str]) -> int:
+        mask = 0
+        for t in tags:
+            mask |= 1 << self.intern(t)
+        return mask
+
+    def decode(self, mask: int) -> list[str]:
+        return [self._tags[bit] for bit in iterBits(mask)]
+
+    def __contains__(self, tag: object) -> bool:
+        return tag in self._bits
+
+    def __len__(self):
+        return len(self._tags)
+
+
+def iterBits(mask: int) -> Iterator[int]:
+    """Yield positions of set bits, starting from the lowest."""
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+class TagBatch:
+    """Column oriented bitsets for a batch of records.
+
+    Each tag has one `int` where bit `i` is set when record `i` has this tag.
+    A whole tag filter tree is then evaluated with a few big-int
+    `&`, `|`, `^` operations instead of a python call per record.
+
+    Example:
+    >>> from pyqt_utils.widgets.tag_filter.nodes import TagFilterNode
+    >>> batch = TagBatch([{'a', 'b'}, {'b'}, set()])
+    >>> TagFilterNode('b').filterBatch(batch)
+    [True, True, False]
+    """
+
+    def __init__(
+        self,
+        records: Iterable[Iterable[str]],
+        vocabulary: TagVocabulary | None = None,
+    ):
+        self.vocabulary = TagVocabulary() if vocabulary is None else vocabulary
+        self._positions: defaultdict[int, list[int]] = defaultdict(list)
+        self._columns: dict[int, int] = {}
+
+        size = 0
+        for size, tags in enumerate(records, 1):
+            for t in tags:
+                self._positions[self.vocabulary.intern(t)].append(size - 1)
+        self._setSize(size)
+
+    def _setSize(self, size: int):
+        self._size = size
+        self.allMask = (1 << size) - 1
+
+    @classmethod
+    def fromMasks(cls, masks: Iterable[int], vocabulary: TagVocabulary):
+        """Create batch from records encoded by `TagVocabulary.encode`."""
+        batch = cls((), vocabulary)
+        size = 0
+        for size, mask in enumerate(masks, 1):
+            for bit in iterBits(mask):
+                batch._positions[bit].append(size - 1)
+        batch._setSize(size)
+        return batch
+
+    def column(self, tag: str) -> int:
+        if (bit := self.vocabulary.bit(tag)) is None:
+            return 0
+
+        if (column := self._columns.get(bit)) is None:
+            buffer = bytearray((self._size + 7) // 8)
+            for pos in self._positions.get(bit, ()):
+                buffer[pos >> 3] |= 1 << (pos & 7)
+            column = self._columns[bit] = int.from_bytes(buffer, 'little')
+        return column
+
+    def toBoolList(self, mask: int) -> list[bool]:
+        if not self._size:
+            return []
+        bits = format(mask & self.allMask, f'0{self._size}b')
+        return [b == '1' for b in reversed(bits)]
+
+    def toIndexes(self, mask: int) -> list[int]:
+        return list(iterBits(mask & self.allMask))
+
+    def __len__(self):
+        return self._size
@@ -4,19 +4,27 @@ import copy
 import logging
 from typing import TYPE_CHECKING
 
-from PyQt5.QtCore import QItemSelectionModel, QModelIndex, QStringListModel, Qt
-from PyQt5.QtTest import QAbstractItemModelTester
-from PyQt5.QtWidgets import QCompleter, QDialog, QListWidget
+from PyQt5.QtCore import QItemSelectionModel, QModelIndex
+from PyQt5.QtWidgets import QCompleter, QDialog
 
+from pyqt_utils.python.sorted_index import SortedStringIndex
 from pyqt_utils.qobjects.substring_validator import SubstringValidator
 from pyqt_utils.ui.tag_dialog_ui import Ui_TagDialog
 from pyqt_utils.widgets.base_ui_widget import BaseUiWidget
 from pyqt_utils.widgets.tag_filter.model import TagFilterModel
+from pyqt_utils.widgets.tag_filter.model_checker import (
+    ModelCheckMode,
+    createModelChecker,
+)
 from pyqt_utils.widgets.tag_filter.nodes import (
     TagFilterAndNode,
     TagFilterOrNode,
     TagFilterSequenceNode,
 )
+from pyqt_utils.widgets.tag_filter.possible_tags_model import (
+    PossibleTagsModel,
+    PrefixCompletionModel,
+)
 
 if TYPE_CHECKING:
     from collections.abc import Iterable
@@ -25,18 +33,25 @@ logger = logging.getLogger(__name__)
 
 
 class TagFilterDialog(Ui_TagDialog, QDialog, BaseUiWidget):
-    _activeListWidget: None | QListWidget
-    _possibleValues: list[str]
+    _possibleTagsIndex: SortedStringIndex
 
     def __init__(
         self,
         *args,
         existingNode: TagFilterOrNode | None = None,
         possibleValues: Iterable[str] = (),
+        modelCheck: ModelCheckMode | None = None,
         **kwargs,
     ):
+        """Create dialog.
+
+        :param modelCheck: How to validate the model after changes,
+            by default it is read from the environment,
+            see `ModelCheckMode.fromEnvironment`.
+        """
         kwargs['possibleValues'] = possibleValues
         kwargs['existingNode'] = existingNode
+        kwargs['modelCheck'] = modelCheck
         super().__init__(*args, **kwargs)
 
     def __post_init__(
@@ -44,18 +59,19 @@ class TagFilterDialog(Ui_TagDialog, QDialog, BaseUiWidget):
         *args,
         existingNode: TagFilterOrNode | None = None,
         possibleValues: Iterable[str] = (),
+        modelCheck: ModelCheckMode | None = None,
         **kwargs,
     ):
         super().__post_init__(*args, **kwargs)
+        self._possibleTagsModel = PossibleTagsModel(parent=self)
+        self.possibleTagsWidget.setModel(self._possibleTagsModel)
         self.setPossibleValues(possibleValues)
 
         self._tagModel = TagFilterModel(existingNode)
         self._tagModel.rowsInserted.connect(self.onIncludeRowsInserted)
         self._tagModel.rowsMoved.connect(self.onIncludeRowsMoved)
         self._tagModel.dataChanged.connect(self.onIncludeRowsMoved)
-        self._testModel = QAbstractItemModelTester(
-            self._tagModel, QAbstractItemModelTester.FailureReportingMode.Warning, self
-        )
+        self._modelChecker = createModelChecker(self._tagModel, modelCheck, self)
         self.expressionTree.setModel(self._tagModel)
         self.expressionTree.expandAll()
         self.expressionTree.setAcceptDrops(True)
@@ -66,25 +82,34 @@ class TagFilterDialog(Ui_TagDialog, QDialog, BaseUiWidget):
         self.andButton.clicked.connect(self.onAndClicked)
         self.negateButton.clicked.connect(self.onNegateClicked)
 
-        self.searchLineEdit.setCompleter(QCompleter(self._possibleValues, self))
-        self.searchLineEdit.setValidator(SubstringValidator(self._possibleValues, self))
+        completionModel = PrefixCompletionModel(self._possibleTagsIndex, self)
+        completer = QCompleter(completionModel, self)
+        # rows are filtered by the index, so QCompleter does not fetch all of them
+        completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.searchLineEdit.setCompleter(completer)
+        self.searchLineEdit.textEdited.connect(completionModel.setPrefix)
+        validator = SubstringValidator(self._possibleTagsIndex, self)
+        self.searchLineEdit.setValidator(validator)
         self.searchLineEdit.textChanged.connect(self.onSearchLineTextChanged)
 
         self._tagModel.failureCause.connect(self.statusBar.showMessage)
 
     def setPossibleValues(self, values: Iterable[str]):
-        self._possibleValues = sorted(set(values))
-        self.possibleTagsWidget.clear()
-        self.possibleTagsWidget.addItems(self._possibleValues)
+        """Set tags shown in the list, searched and completed case-insensitively.
+
+        Typed tag is validated case-sensitively, using the same index.
+        """
+        self._possibleTagsIndex = SortedStringIndex(values, caseSensitive=False)
+        self._possibleTagsModel.setSortedIndex(self._possibleTagsIndex)
 
         if comp := self.searchLineEdit.completer():
-            if isinstance(model := comp.model(), QStringListModel):
-                model.setStringList(values)
+            if isinstance(model := comp.model(), PossibleTagsModel):
+                model.setSortedIndex(self._possibleTagsIndex)
             else:
                 logger.warning("Unsupported completion model")
 
         if isinstance(validator := self.searchLineEdit.validator(), SubstringValidator):
-            validator.setPossibleValues(self._possibleValues)
+            validator.setPossibleValues(self._possibleTagsIndex)
 
     def onIncludeRowsInserted(self, parent: QModelIndex, first: int, last: int):
         self._expandView(parent, first, last)
@@ -104,10 +129,10 @@ class TagFilterDialog(Ui_TagDialog, QDialog, BaseUiWidget):
             self.expressionTree.expandRecursively(self._tagModel.index(row, 0, parent))
 
     def onIncludeClicked(self):
-        if indexes := self.possibleTagsWidget.selectedIndexes():
+        selectionModel = self.possibleTagsWidget.selectionModel()
+        if selectionModel is not None and (indexes := selectionModel.selectedIndexes()):
             includeItem = self.expressionTree.currentIndex()
-            for i in indexes:
-                self._tagModel.addSimple(i.data(), includeItem)
+            self._tagModel.addMany([i.data() for i in indexes], includeItem)
 
     def onRemoveClicked(self):
         if indexes := self.expressionTree.selectedIndexes():
@@ -136,9 +161,8 @@ class TagFilterDialog(Ui_TagDialog, QDialog, BaseUiWidget):
             self._tagModel.negate(indexes[0])
 
     def onSearchLineTextChanged(self, newText: str):
-        if founded := self.possibleTagsWidget.findItems(newText, Qt.MatchFixedString):
-            f = founded[0]  # all items should be unique
-            self.possibleTagsWidget.setCurrentItem(f)
+        if (index := self._possibleTagsModel.indexOfValue(newText)).isValid():
+            self.possibleTagsWidget.setCurrentIndex(index)
 
     def getValue(self):
         return copy.deepcopy(self._tagModel.topNode)
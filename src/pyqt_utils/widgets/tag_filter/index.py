@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from collections.abc import Hashable, Iterable, Mapping
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import KeysView
+    from collections.abc import Set as AbstractSet
+
+    from pyqt_utils.widgets.tag_filter.nodes import TagFilterNode
+
+_emptyPostings: frozenset = frozenset()
+
+
+class TagIndex[K: Hashable]:
+    """Inverted index from tag name to ids of records having this tag.
+
+    A tag filter tree is evaluated with set operations on posting sets,
+    so the cost depends on the posting sizes instead of the number of records.
+
+    Example:
+    >>> from pyqt_utils.widgets.tag_filter.nodes import TagFilterNode
+    >>> index = TagIndex({1: ['a', 'b'], 2: ['b'], 3: []})
+    >>> sorted(index.query(TagFilterNode('b')))
+    [1, 2]
+    >>> index.remove(1)
+    True
+    >>> sorted(index.query(TagFilterNode('b')))
+    [2]
+    """
+
+    def __init__(self, records: Mapping[K, Iterable[str]] | None = None):
+        self._postings: dict[str, set[K]] = {}
+        self._records: dict[K, frozenset[str]] = {}
+        if records is not None:
+            for recordId, tags in records.items():
+                self.add(recordId, tags)
+
+    def add(self, recordId: K, tags: Iterable[str]):
+        """Add a record or replace tags of already existing record."""
+        newTags = frozenset(tags)
+        if (oldTags := self._records.get(recordId)) is not None:
+            self._removePostings(recordId, oldTags - newTags)
+            addedTags = newTags - oldTags
+        else:
+            addedTags = newTags
+
+        self._records[recordId] = newTags
+        for t in addedTags:
+            if (posting := self._postings.get(t)) is None:
+                posting = self._postings[t] = set()
+            posting.add(recordId)
+
+    def remove(self, recordId: K) -> bool:
+        if (tags := self._records.pop(recordId, None)) is None:
+            return False
+
+        self._removePostings(recordId, tags)
+        return True
+
+    def _removePostings(self, recordId: K, tags: Iterable[str]):
+        for t in tags:
+            posting = self._postings[t]
+            posting.discard(recordId)
+            if not posting:
+                del self._postings[t]
+
+    def postings(self, tag: str) -> AbstractSet[K]:
+        """Return ids of records with the tag, the result must not be modified."""
+        return self._postings.get(tag, _emptyPostings)
+
+    def probability(self, tag: str) -> float:
+        """Return fraction of records with the tag."""
+        if not self._records:
+            return 0.0
+        return len(self.postings(tag)) / len(self._records)
+
+    @property
+    def allIds(self) -> KeysView[K]:
+        return self._records.keys()
+
+    def tags(self, recordId: K) -> frozenset[str]:
+        return self._records[recordId]
+
+    def query(self, node: TagFilterNode) -> set[K]:
+        """Return ids of records accepted by the node."""
+        return set(node.evaluateIndex(self))
+
+    def __contains__(self, recordId: object) -> bool:
+        return recordId in self._records
+
+    def __len__(self):
+        return len(self._records)
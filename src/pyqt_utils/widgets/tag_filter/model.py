@@ -93,9 +93,7 @@ class TagFilterModel(QAbstractItemModel):
             parentRow = 0
         else:
             parentNode = self._checkType(parentNode, TagFilterSequenceNode)
-            parentRow = next(
-                i for i, n in enumerate(parentNode.tagList) if n == curNode
-            )
+            parentRow = parentNode.rowOf(curNode)
 
         self._checkType(curNode)
         return self.createIndex(parentRow, 0, curNode)
@@ -125,6 +123,7 @@ class TagFilterModel(QAbstractItemModel):
     def supportedDropActions(self) -> Qt.DropActions:
         return Qt.MoveAction | Qt.CopyAction
 
+    MAX_REPORTED_TAGS = 10
     TAG_FILTER_MIME = 'application/tag_filter_indexes'
     QT_MIME = 'application/x-qabstractitemmodeldatalist'
 
@@ -151,7 +150,7 @@ class TagFilterModel(QAbstractItemModel):
                     break
 
                 nodeParent = self._checkType(nodeParent, TagFilterSequenceNode)
-                nodePath.append(nodeParent.tagList.index(prevNode))
+                nodePath.append(nodeParent.rowOf(prevNode))
                 prevNode = nodeParent
 
             else:
@@ -189,13 +188,7 @@ class TagFilterModel(QAbstractItemModel):
             return False
 
         values = [model.item(rowNum, 0).text() for rowNum in range(model.rowCount())]
-        if row == -1:
-            for val in values:
-                self.addSimple(val, parentIndex)
-        else:
-            for i, val in enumerate(values, row):
-                self.addSimple(val, parentIndex, i)
-
+        self.addMany(values, parentIndex, None if row == -1 else row)
         return True
 
     def _dropNodePath(
@@ -226,9 +219,8 @@ class TagFilterModel(QAbstractItemModel):
         if first == -1:  # we append at the end
             first = len(nodeParent.tagList)
 
-        self.beginInsertRows(parentIndex, first, first + len(nodePaths) - 1)
-        for pos, node in enumerate(nodes, first):
-            nodeParent.insert(pos, node)
+        self.beginInsertRows(parentIndex, first, first + len(nodes) - 1)
+        nodeParent.insertMany(first, nodes)
         self.endInsertRows()
         return True
 
@@ -240,6 +232,15 @@ class TagFilterModel(QAbstractItemModel):
         return node
 
     def addSimple(self, text: str, parent: QModelIndex, row: int | None = None) -> bool:
+        return self.addMany([text], parent, row) == 1
+
+    def addMany(
+        self, texts: Iterable[str], parent: QModelIndex, row: int | None = None
+    ) -> int:
+        """Add tags not existing in the parent as one block of rows.
+
+        :return: Number of added tags.
+        """
         if parent.isValid():
             node = parent.internalPointer()
         else:
@@ -248,21 +249,38 @@ class TagFilterModel(QAbstractItemModel):
 
         if not isinstance(node, TagFilterSequenceNode):
             self.failureCause.emit(self.tr("Index is not of sequence type"))
-            return False
+            return 0
+
+        existing = {t.tagName for t in node.tagList}
+        newTexts: list[str] = []
+        duplicates: list[str] = []
+        for text in texts:
+            if text in existing:
+                duplicates.append(text)
+            else:
+                existing.add(text)
+                newTexts.append(text)
 
-        for t in node.tagList:
-            if t.tagName == text:
+        match duplicates:
+            case []:
+                pass
+            case [text]:
                 msg = self.tr("Tag with name: {} already exist")
                 self.failureCause.emit(msg.format(text))
-                return False
+            case _:
+                msg = self.tr("{} tags already exist: {}")
+                shown = ', '.join(duplicates[: self.MAX_REPORTED_TAGS])
+                self.failureCause.emit(msg.format(len(duplicates), shown))
 
-        if row is None:
+        if not newTexts:
+            return 0
+
+        if row is None or row > len(node.tagList):
             row = len(node.tagList)
-        self.beginInsertRows(parent, row, row)
-        tn = TagFilterNode(tagName=text, parent=node)
-        node.insert(row, tn)
+        self.beginInsertRows(parent, row, row + len(newTexts) - 1)
+        node.insertMany(row, (TagFilterNode(tagName=t) for t in newTexts))
         self.endInsertRows()
-        return True
+        return len(newTexts)
 
     def mergeTags(
         self, nodeType: type[TagFilterSequenceNode], indexes: list[QModelIndex]
@@ -278,7 +296,7 @@ class TagFilterModel(QAbstractItemModel):
                 self.failureCause.emit(self.tr("Indexes have different parents"))
                 return None
 
-            index = nodeParent.tagList.index(ind.internalPointer())
+            index = nodeParent.rowOf(ind.internalPointer())
             firstNodeIndex = min(firstNodeIndex, index)
 
         nodes = self.removeIndexes(indexes)
@@ -294,20 +312,54 @@ class TagFilterModel(QAbstractItemModel):
         return self.index(firstNodeIndex, 0, indexParent)
 
     def removeIndexes(self, indexes: list[QModelIndex]) -> list[TagFilterNode]:
-        if self._isIndexInvalid(*indexes):
-            return []
+        """Remove indexes, nodes are returned in reversed order."""
+        return self.removeMany(indexes)[::-1]
 
-        sortedIndexes = sorted(indexes, key=lambda i: -i.row())
-        return [self._remove(ind) for ind in sortedIndexes]
+    def removeMany(self, indexes: Iterable[QModelIndex]) -> list[TagFilterNode]:
+        """Remove indexes with one signal per block of contiguous rows.
 
-    def _remove(self, curIndex: QModelIndex):
-        node = self._getFromInternalPointer(curIndex)
-        parentNode = self._checkType(node.parent, TagFilterSequenceNode)
+        Indexes which ancestor is also removed are ignored,
+        because they are removed with the ancestor.
+        Rows of remaining children are updated once per parent.
+        """
+        indexes = list(indexes)
+        if self._isIndexInvalid(*indexes):
+            return []
 
-        self.beginRemoveRows(curIndex.parent(), curIndex.row(), curIndex.row())
-        parentNode.remove(node)
-        self.endRemoveRows()
-        return node
+        nodes: set[TagFilterNode] = {self._getFromInternalPointer(i) for i in indexes}
+        parentToRows: dict[TagFilterSequenceNode, list[int]] = {}
+        for node in nodes:
+            parentNode = self._checkType(node.parent, TagFilterSequenceNode)
+            ancestor: TagFilterNode | None = parentNode
+            while ancestor is not None and ancestor not in nodes:
+                ancestor = ancestor.parent
+            if ancestor is None:
+                parentToRows.setdefault(parentNode, []).append(parentNode.rowOf(node))
+
+        removed: list[TagFilterNode] = []
+        for parentNode, rows in parentToRows.items():
+            parentIndex = self._getIndexFromNode(parentNode)
+            removedFromParent: list[TagFilterNode] = []
+            # blocks are removed from the end, so rows before them are still valid
+            for first, last in reversed(self._groupContiguous(sorted(rows))):
+                self.beginRemoveRows(parentIndex, first, last)
+                removedFromParent[:0] = parentNode.removeRows(
+                    first, last - first + 1, updateRows=False
+                )
+                self.endRemoveRows()
+            parentNode.updateRows(min(rows))
+            removed += removedFromParent
+        return removed
+
+    @staticmethod
+    def _groupContiguous(sortedRows: list[int]) -> list[tuple[int, int]]:
+        ranges: list[tuple[int, int]] = []
+        for row in sortedRows:
+            if ranges and ranges[-1][1] + 1 == row:
+                ranges[-1] = (ranges[-1][0], row)
+            else:
+                ranges.append((row, row))
+        return ranges
 
     def _isIndexInvalid(self, *indexes: QModelIndex) -> bool:
         if not indexes:
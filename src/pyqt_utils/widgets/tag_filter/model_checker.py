@@ -0,0 +1,160 @@
+import logging
+import os
+from enum import Enum
+
+from PyQt5.QtCore import QModelIndex, QObject
+from PyQt5.QtTest import QAbstractItemModelTester
+
+from pyqt_utils.widgets.tag_filter.model import TagFilterModel
+from pyqt_utils.widgets.tag_filter.nodes import TagFilterSequenceNode
+
+logger = logging.getLogger(__name__)
+MODEL_CHECK_ENV = 'PYQT_UTILS_MODEL_CHECK'
+
+
+class ModelCheckMode(Enum):
+    NONE = 'none'
+    SAMPLING = 'sampling'
+    """Check only sample of rows changed by the model signal."""
+    FULL = 'full'
+    """Check the whole model on every signal by `QAbstractItemModelTester`."""
+
+    @classmethod
+    def fromEnvironment(cls) -> 'ModelCheckMode':
+        """Read mode from the environment variable `MODEL_CHECK_ENV`.
+
+        By default, the check is disabled,
+        it must be enabled explicitly e.g. in tests or during development.
+        """
+        if not (value := os.environ.get(MODEL_CHECK_ENV, '')):
+            return cls.NONE
+
+        try:
+            return cls(value.lower())
+        except ValueError:
+            logger.warning(f"Unknown model check mode: {value}, check is disabled")
+            return cls.NONE
+
+
+def createModelChecker(
+    model: TagFilterModel, mode: ModelCheckMode | None = None, parent=None
+) -> QObject | None:
+    match ModelCheckMode.fromEnvironment() if mode is None else mode:
+        case ModelCheckMode.FULL:
+            return QAbstractItemModelTester(
+                model, QAbstractItemModelTester.FailureReportingMode.Warning, parent
+            )
+        case ModelCheckMode.SAMPLING:
+            return TagFilterModelChecker(model, parent)
+        case _:
+            return None
+
+
+class TagFilterModelChecker(QObject):
+    """Lightweight model check, which validates only the changed subtree.
+
+    For every signal, at most `sampleSize` rows are checked,
+    including rows in their subtrees. Failures are reported as warnings.
+    """
+
+    def __init__(self, model: TagFilterModel, parent=None, *, sampleSize: int = 16):
+        super().__init__(parent)
+        self._model = model
+        self._sampleSize = sampleSize
+        self.failureCount = 0
+
+        model.rowsInserted.connect(self.onRowsInserted)
+        model.rowsRemoved.connect(self.onRowsRemoved)
+        model.rowsMoved.connect(self.onRowsMoved)
+        model.dataChanged.connect(self.onDataChanged)
+        model.modelReset.connect(self.onModelReset)
+
+    def onRowsInserted(self, parent: QModelIndex, first: int, last: int):
+        self._checkRows(parent, first, last)
+
+    def onRowsRemoved(self, parent: QModelIndex, _first: int, _last: int):
+        self._checkParent(parent)
+
+    def onRowsMoved(
+        self,
+        sourceParent: QModelIndex,
+        _start: int,
+        _end: int,
+        destination: QModelIndex,
+        row: int,
+    ):
+        self._checkParent(sourceParent)
+        self._checkRows(destination, row, row)
+
+    def onDataChanged(self, topLeft: QModelIndex, bottomRight: QModelIndex):
+        self._checkRows(topLeft.parent(), topLeft.row(), bottomRight.row())
+
+    def onModelReset(self):
+        self._checkRows(QModelIndex(), 0, self._model.rowCount() - 1)
+
+    @staticmethod
+    def _sampleRows(first: int, last: int, sampleSize: int) -> range:
+        step = max(1, -(-(last - first + 1) // sampleSize))
+        return range(first, last + 1, step)
+
+    def _checkParent(self, parent: QModelIndex) -> TagFilterSequenceNode | None:
+        if not parent.isValid():
+            return None
+
+        node = parent.internalPointer()
+        if not isinstance(node, TagFilterSequenceNode):
+            self._fail(f"Parent {node!r} is not a sequence node")
+            return None
+
+        if (rowCount := self._model.rowCount(parent)) != len(node.tagList):
+            self._fail(f"Row count {rowCount} differs from {len(node.tagList)=}")
+        if parent.parent().isValid() and self._model.parent(parent) != parent.parent():
+            self._fail(f"Invalid parent index of {node!r}")
+        return node
+
+    def _checkRows(
+        self, parent: QModelIndex, first: int, last: int, budget: int | None = None
+    ) -> int:
+        """Check rows and their subtrees, return remaining number of rows to check."""
+        if budget is None:
+            budget = self._sampleSize
+
+        parentNode = self._checkParent(parent)
+        for row in self._sampleRows(first, last, budget):
+            if budget <= 0:
+                break
+            budget -= 1
+
+            index = self._checkRow(parent, parentNode, row)
+            if index is None:
+                continue
+
+            if budget > 0 and (childCount := self._model.rowCount(index)):
+                budget = self._checkRows(index, 0, childCount - 1, budget)
+
+        return budget
+
+    def _checkRow(
+        self, parent: QModelIndex, parentNode: TagFilterSequenceNode | None, row: int
+    ) -> QModelIndex | None:
+        index = self._model.index(row, 0, parent)
+        if not index.isValid():
+            self._fail(f"Invalid index at {row=} of {parentNode!r}")
+            return None
+
+        node = index.internalPointer()
+        if self._model.parent(index) != parent:
+            self._fail(f"Invalid parent of {node!r} at {row=}")
+        if self._model.data(index) is None:
+            self._fail(f"No data for {node!r}")
+
+        if parentNode is not None:
+            if node.parent is not parentNode:
+                self._fail(f"Node {node!r} has parent {node.parent!r}")
+            if node.row != row or parentNode.tagList[row] is not node:
+                self._fail(f"Node {node!r} is not at {row=} of {parentNode!r}")
+        return index
+
+    def _fail(self, msg: str):
+        self.failureCount += 1
+        logger.warning(f"Model check failed: {msg}")
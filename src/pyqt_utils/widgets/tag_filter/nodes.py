@@ -3,8 +3,17 @@ from __future__ import annotations
 import pickle
 from typing import TYPE_CHECKING, Protocol, Self, overload
 
+from pyqt_utils.widgets.tag_filter.bitset import TagBatch
+
 if TYPE_CHECKING:
-    from collections.abc import Container, Iterable
+    from collections.abc import Callable, Container, Hashable, Iterable
+    from collections.abc import Set as AbstractSet
+
+    from pyqt_utils.widgets.tag_filter.index import TagIndex
+
+type TagPredicate = Callable[[Container[StrComparable | str]], bool]
+_PROPERTY_ATTRIBUTES = ('tagName', 'tagList')
+"""Attributes stored with `_` prefix, which invalidate the compiled predicate."""
 
 
 class StrComparable(Protocol):  # noqa: PLW1641 #SKIP this is protocol
@@ -16,13 +25,78 @@ class StrComparable(Protocol):  # noqa: PLW1641 #SKIP this is protocol
 
 class TagFilterNode:
     TAG_NAME = ''
+    _compiled: TagPredicate | None = None
+    row = -1
+    """Position in `parent.tagList`, maintained by `TagFilterSequenceNode`."""
 
     def __init__(self, tagName: str | None = None, parent: TagFilterNode | None = None):
-        self.tagName = self.TAG_NAME if tagName is None else tagName
+        self._tagName = self.TAG_NAME if tagName is None else tagName
         self.parent = parent
 
+    @property
+    def tagName(self) -> str:
+        return self._tagName
+
+    @tagName.setter
+    def tagName(self, tagName: str):
+        self._tagName = tagName
+        self.invalidateCompiled()
+
     def isAccepted(self, tags: Container[StrComparable | str]) -> bool:
-        return self.tagName in tags
+        return self._tagName in tags
+
+    def compile(self) -> TagPredicate:
+        """Return a predicate equivalent to `isAccepted`, but without recursion.
+
+        The whole subtree is translated to a single boolean expression,
+        so `and`/`or` short-circuiting is done by the interpreter.
+        The predicate is cached and invalidated when the subtree is modified
+        by methods or by assignment of `tagName` or `tagList`.
+        In-place changes of `tagList` require `invalidateCompiled`.
+        """
+        if (compiled := self._compiled) is None:
+            tagVariables: dict[str, str] = {}
+            namespace: dict[str, object] = {'__builtins__': {}}
+            try:
+                expression = self.compileExpression(tagVariables)
+                namespace.update((var, tag) for tag, var in tagVariables.items())
+                # SKIP: the expression contains only generated variable names
+                compiled = eval(f'lambda tags: {expression}', namespace)  # noqa: S307
+            except (SyntaxError, RecursionError, MemoryError):
+                # the tree is too deep for the parser
+                compiled = self.isAccepted
+
+            self._compiled = compiled
+        return compiled
+
+    def compileExpression(self, tagVariables: dict[str, str]) -> str:
+        """Return python expression for this node, `tags` is the tested container.
+
+        :param tagVariables: Mapping from tag name to the variable name
+            used in the expression. It is updated with new tags.
+        """
+        if (var := tagVariables.get(self.tagName)) is None:
+            var = tagVariables[self.tagName] = f't{len(tagVariables)}'
+        return f'({var} in tags)'
+
+    def invalidateCompiled(self):
+        self._compiled = None
+        if self.parent is not None:
+            self.parent.invalidateCompiled()
+
+    def filterBatch(self, records: TagBatch | Iterable[Iterable[str]]) -> list[bool]:
+        """Return for each record if it is accepted, see `TagBatch`."""
+        if not isinstance(records, TagBatch):
+            records = TagBatch(records)
+        return records.toBoolList(self.evaluateBatch(records))
+
+    def evaluateBatch(self, batch: TagBatch) -> int:
+        """Return bitmask with records accepted by this node."""
+        return batch.column(self.tagName)
+
+    def evaluateIndex[K: Hashable](self, index: TagIndex[K]) -> AbstractSet[K]:
+        """Return ids of records accepted by this node, the result is read-only."""
+        return index.postings(self.tagName)
 
     def filterTags(self, allowedTags: Iterable[str]):
         return self.tagName in allowedTags
@@ -35,11 +109,57 @@ class TagFilterNode:
 
     @classmethod
     def deserialize(cls, data: bytes) -> Self:
-        # SKIP: TODO [P2]: temporary ignored, maybe this could be a json?
-        return pickle.loads(data)  # noqa: S301
+        """Load tree saved by `serialize` or in json format, safe for untrusted data.
+
+        Data pickled by older versions is rejected, see `migrateLegacyPickle`.
+        """
+        from pyqt_utils.widgets.tag_filter import serialization  # noqa: PLC0415
+
+        if data.startswith(serialization.MAGIC):
+            node = serialization.loads(data)
+        elif data.lstrip().startswith(b'{'):
+            node = serialization.loadsJson(data)
+        else:
+            msg = "Unknown format, legacy pickle requires `migrateLegacyPickle`"
+            raise serialization.TagFilterFormatError(msg)
+        return cls._checkLoaded(node)
+
+    @classmethod
+    def migrateLegacyPickle(cls, data: bytes) -> Self:
+        """Load tree pickled by older versions of `serialize`.
+
+        Unpickling can execute arbitrary code, use it only for trusted data
+        and save the result by `serialize`.
+        """
+        # SKIP: explicitly requested migration of trusted data
+        return cls._checkLoaded(pickle.loads(data))  # noqa: S301
+
+    @classmethod
+    def _checkLoaded(cls, node: object) -> Self:
+        if not isinstance(node, cls):
+            msg = f"Expected {cls}, got {type(node)}"
+            raise TypeError(msg)
+        return node
 
     def serialize(self) -> bytes:
-        return pickle.dumps(self, protocol=0)
+        from pyqt_utils.widgets.tag_filter import serialization  # noqa: PLC0415
+
+        return serialization.dumps(self)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_compiled', None)
+        # the same names as before properties, so the pickle format is not changed
+        for name in _PROPERTY_ATTRIBUTES:
+            if (privateName := f'_{name}') in state:
+                state[name] = state.pop(privateName)
+        return state
+
+    def __setstate__(self, state: dict[str, object]):
+        for name in _PROPERTY_ATTRIBUTES:
+            if name in state:
+                state[f'_{name}'] = state.pop(name)
+        self.__dict__.update(state)
 
     def __len__(self):
         return 0
@@ -51,22 +171,81 @@ class TagFilterSequenceNode(TagFilterNode):
         tagList: list[TagFilterNode] | None = None,
         parent: TagFilterNode | None = None,
     ):
-        self.tagList = [] if tagList is None else tagList
         super().__init__(parent=parent)
-        for t in self.tagList:
+        self.tagList = [] if tagList is None else tagList
+
+    @property
+    def tagList(self) -> list[TagFilterNode]:
+        return self._tagList
+
+    @tagList.setter
+    def tagList(self, tagList: list[TagFilterNode]):
+        self._tagList = tagList
+        for t in tagList:
             t.parent = self
+        self.updateRows()
+        self.invalidateCompiled()
 
     def filterTags(self, allowedTags: Iterable[str]):
         self.tagList = [t for t in self.tagList if t.filterTags(allowedTags)]
         return bool(self.tagList)
 
     def insert(self, pos: int, node: TagFilterNode):
-        self.tagList.insert(pos, node)
-        node.parent = self
+        self.insertMany(pos, [node])
+
+    def insertMany(self, pos: int, nodes: Iterable[TagFilterNode]):
+        size = len(self.tagList)
+        pos = min(max(size + pos, 0) if pos < 0 else pos, size)
+        nodes = list(nodes)
+        self.tagList[pos:pos] = nodes
+        for node in nodes:
+            node.parent = self
+        self.updateRows(pos)
+        self.invalidateCompiled()
 
     def remove(self, node: TagFilterNode):
-        self.tagList.remove(node)
-        node.parent = None
+        self.removeRows(self.rowOf(node), 1)
+
+    def removeRows(
+        self, first: int, count: int, *, updateRows: bool = True
+    ) -> list[TagFilterNode]:
+        """Remove `count` children starting at `first`.
+
+        :param updateRows: If False, rows of following children are not updated,
+            so multiple blocks can be removed, followed by a single `updateRows`.
+        """
+        removed = self.tagList[first : first + count]
+        del self.tagList[first : first + count]
+        for node in removed:
+            node.parent = None
+            node.row = -1
+        if updateRows:
+            self.updateRows(first)
+        self.invalidateCompiled()
+        return removed
+
+    def rowOf(self, node: TagFilterNode) -> int:
+        """Return position of the child in O(1)."""
+        row = node.row
+        if 0 <= row < len(self.tagList) and self.tagList[row] is node:
+            return row
+
+        # `tagList` was modified directly or the node was unpickled
+        self.updateRows()
+        if 0 <= node.row < len(self.tagList) and self.tagList[node.row] is node:
+            return node.row
+
+        msg = f"{node!r} is not a child of {self!r}"
+        raise ValueError(msg)
+
+    def updateRows(self, start: int = 0):
+        tagList = self.tagList
+        for row in range(start, len(tagList)):
+            tagList[row].row = row
+
+    def _compileSequence(self, tagVariables: dict[str, str], operator: str) -> str:
+        expressions = [t.compileExpression(tagVariables) for t in self.tagList]
+        return f'({f" {operator} ".join(expressions)})'
 
     def __repr__(self):
         return f'{self}[{",".join(repr(t) for t in self.tagList)}]'
@@ -78,9 +257,25 @@ class TagFilterSequenceNode(TagFilterNode):
 class TagFilterOrNode(TagFilterSequenceNode):
     TAG_NAME = 'OR'
 
-    def isAccepted(self, tags: list[str]) -> bool:
+    def isAccepted(self, tags: Container[StrComparable | str]) -> bool:
         return any(t.isAccepted(tags) for t in self.tagList)
 
+    def compileExpression(self, tagVariables: dict[str, str]) -> str:
+        if not self.tagList:
+            return 'False'
+        return self._compileSequence(tagVariables, 'or')
+
+    def evaluateBatch(self, batch: TagBatch) -> int:
+        mask = 0
+        for t in self.tagList:
+            mask |= t.evaluateBatch(batch)
+            if mask == batch.allMask:
+                break
+        return mask
+
+    def evaluateIndex[K: Hashable](self, index: TagIndex[K]) -> AbstractSet[K]:
+        return set().union(*(t.evaluateIndex(index) for t in self.tagList))
+
 
 class TagFilterExcludeNode(TagFilterSequenceNode):
     TAG_NAME = 'NOT'
@@ -88,8 +283,17 @@ class TagFilterExcludeNode(TagFilterSequenceNode):
     def __init__(self, tagContent: TagFilterNode, parent: TagFilterNode | None = None):
         super().__init__([tagContent], parent=parent)
 
-    def isAccepted(self, tags: list[str]) -> bool:
-        return not super().isAccepted(tags)
+    def isAccepted(self, tags: Container[StrComparable | str]) -> bool:
+        return not self.content.isAccepted(tags)
+
+    def compileExpression(self, tagVariables: dict[str, str]) -> str:
+        return f'(not {self.content.compileExpression(tagVariables)})'
+
+    def evaluateBatch(self, batch: TagBatch) -> int:
+        return batch.allMask ^ self.content.evaluateBatch(batch)
+
+    def evaluateIndex[K: Hashable](self, index: TagIndex[K]) -> AbstractSet[K]:
+        return index.allIds - self.content.evaluateIndex(index)
 
     @property
     def content(self):
@@ -104,5 +308,45 @@ class TagFilterExcludeNode(TagFilterSequenceNode):
 class TagFilterAndNode(TagFilterSequenceNode):
     TAG_NAME = 'AND'
 
-    def isAccepted(self, tags: list[str]) -> bool:
+    def isAccepted(self, tags: Container[StrComparable | str]) -> bool:
         return all(t.isAccepted(tags) for t in self.tagList)
+
+    def compileExpression(self, tagVariables: dict[str, str]) -> str:
+        if not self.tagList:
+            return 'True'
+        return self._compileSequence(tagVariables, 'and')
+
+    def evaluateBatch(self, batch: TagBatch) -> int:
+        mask = batch.allMask
+        for t in self.tagList:
+            if not mask:
+                break
+            mask &= t.evaluateBatch(batch)
+        return mask
+
+    def evaluateIndex[K: Hashable](self, index: TagIndex[K]) -> AbstractSet[K]:
+        """Intersect from the smallest result, negated children are subtracted."""
+        included: list[AbstractSet[K]] = []
+        excluded: list[TagFilterNode] = []
+        for t in self.tagList:
+            if isinstance(t, TagFilterExcludeNode):
+                excluded.append(t.content)
+            else:
+                included.append(t.evaluateIndex(index))
+
+        if not included:
+            result = set(index.allIds)
+        else:
+            included.sort(key=len)
+            result = set(included[0])
+            for ids in included[1:]:
+                if not result:
+                    return result
+                result &= ids
+
+        for t in excluded:
+            if not result:
+                break
+            excludedIds: AbstractSet[K] = t.evaluateIndex(index)
+            result -= excludedIds
+        return result
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Callable, Mapping
+from typing import NamedTuple
+
+from pyqt_utils.widgets.tag_filter.nodes import (
+    TagFilterAndNode,
+    TagFilterExcludeNode,
+    TagFilterNode,
+    TagFilterOrNode,
+    TagFilterSequenceNode,
+)
+
+type TagProbability = Callable[[str], float]
+type NodeKey = tuple[str, str | tuple[NodeKey, ...]]
+
+
+class _Estimate(NamedTuple):
+    node: TagFilterNode
+    key: NodeKey
+    probability: float
+    """Probability that the node accepts a record."""
+    cost: float
+    """Expected number of leaves tested during evaluation."""
+    children: tuple[_Estimate, ...] = ()
+
+
+def optimizeTree[N: TagFilterNode](
+    node: N, tagProbability: TagProbability | Mapping[str, float]
+) -> N:
+    """Return an equivalent copy of the tree, which is cheaper to evaluate.
+
+    The tree is simplified: double negation is removed, nested nodes of the same
+    type are flattened, repeated children are removed and sequences with
+    a single child are replaced by the child. The top node keeps its type,
+    so its double negation or single child is kept.
+    Then children are reordered to short-circuit as early as possible:
+    `AND` starts with children most likely to fail, `OR` with children
+    most likely to succeed, cheaper children are preferred.
+
+    :param node: Tree to optimize, it is not modified.
+    :param tagProbability: Fraction of records with the tag, for example
+        `TagIndex.probability`. When a mapping is used, missing tags have 0.
+    """
+    probabilityOf: TagProbability
+    if isinstance(tagProbability, Mapping):
+        probabilities = tagProbability
+        probabilityOf = lambda tag: probabilities.get(tag, 0.0)  # noqa: E731 # SKIP
+    else:
+        probabilityOf = tagProbability
+
+    estimate = _optimize(node, probabilityOf, isTop=True)
+    optimized = estimate.node
+    if type(optimized) is not type(node):
+        msg = f"Optimized node has type {type(optimized)}, expected {type(node)}"
+        raise TypeError(msg)
+    return optimized
+
+
+def _optimize(
+    node: TagFilterNode, tagProbability: TagProbability, *, isTop: bool = False
+) -> _Estimate:
+    match node:
+        case TagFilterExcludeNode():
+            return _optimizeExclude(node, tagProbability, isTop=isTop)
+        case TagFilterAndNode() | TagFilterOrNode():
+            return _optimizeSequence(node, tagProbability, isTop=isTop)
+        case TagFilterSequenceNode():
+            msg = f"Unsupported sequence node {type(node)}"
+            raise TypeError(msg)
+        case _:
+            probability = min(max(tagProbability(node.tagName), 0.0), 1.0)
+            key = (node.TAG_NAME, node.tagName)
+            return _Estimate(TagFilterNode(node.tagName), key, probability, 1)
+
+
+def _optimizeExclude(
+    node: TagFilterExcludeNode, tagProbability: TagProbability, *, isTop: bool
+) -> _Estimate:
+    content = _optimize(node.content, tagProbability)
+    if isinstance(content.node, TagFilterExcludeNode) and not isTop:
+        return content.children[0]
+
+    key = (node.TAG_NAME, (content.key,))
+    excludeNode = TagFilterExcludeNode(content.node)
+    probability = 1 - content.probability
+    return _Estimate(excludeNode, key, probability, content.cost, (content,))
+
+
+def _optimizeSequence(
+    node: TagFilterAndNode | TagFilterOrNode,
+    tagProbability: TagProbability,
+    *,
+    isTop: bool,
+) -> _Estimate:
+    isAnd = isinstance(node, TagFilterAndNode)
+    children: dict[NodeKey, _Estimate] = {}
+    for child in node.tagList:
+        estimate = _optimize(child, tagProbability)
+        if type(estimate.node) is type(node):
+            flattened = estimate.children
+        else:
+            flattened = (estimate,)
+
+        for e in flattened:
+            children.setdefault(e.key, e)
+
+    if len(children) == 1 and not isTop:
+        return next(iter(children.values()))
+
+    def shortCircuitRank(e: _Estimate) -> float:
+        # the child ends evaluation when it fails for AND or succeeds for OR
+        stopProbability = 1 - e.probability if isAnd else e.probability
+        return e.cost / stopProbability if stopProbability else math.inf
+
+    ordered = sorted(children.values(), key=shortCircuitRank)
+
+    cost = 0.0
+    continueProbability = 1.0
+    for e in ordered:
+        cost += continueProbability * e.cost
+        continueProbability *= e.probability if isAnd else 1 - e.probability
+    probability = continueProbability if isAnd else 1 - continueProbability
+
+    key = (node.TAG_NAME, tuple(sorted(children)))
+    newNode = type(node)(tagList=[e.node for e in ordered])
+    return _Estimate(newNode, key, probability, cost, tuple(ordered))
@@ -0,0 +1,126 @@
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, QObject, Qt
+
+from pyqt_utils.python.sorted_index import SortedStringIndex
+
+_rootIndex = QModelIndex()
+
+
+class PossibleTagsModel(QAbstractListModel):
+    """Read-only list of tags, rows are exposed lazily in batches.
+
+    Values are kept in `SortedStringIndex`, which may be shared
+    with other objects, for example `SubstringValidator`.
+    """
+
+    FETCH_SIZE = 1000
+
+    def __init__(
+        self,
+        index: SortedStringIndex | None = None,
+        parent: QObject | None = None,
+        *,
+        fetchSize: int = FETCH_SIZE,
+    ):
+        super().__init__(parent)
+        self._fetchSize = fetchSize
+        self._index = SortedStringIndex() if index is None else index
+        self._resetRows()
+
+    @property
+    def sortedIndex(self) -> SortedStringIndex:
+        return self._index
+
+    def setSortedIndex(self, index: SortedStringIndex):
+        self.beginResetModel()
+        self._index = index
+        self._resetRows()
+        self.endResetModel()
+
+    def _resetRows(self):
+        self._rows = self._selectRows()
+        self._fetched = min(self._fetchSize, len(self._rows))
+
+    def _selectRows(self) -> range:
+        """Return positions of shown values in the index."""
+        return range(len(self._index))
+
+    def rowCount(self, parent: QModelIndex = _rootIndex) -> int:
+        return 0 if parent.isValid() else self._fetched
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self._fetched:
+            return None
+
+        match role:
+            case (
+                Qt.ItemDataRole.DisplayRole
+                | Qt.ItemDataRole.EditRole
+                | Qt.ItemDataRole.ToolTipRole
+            ):
+                return self._index[self._rows[index.row()]]
+        return None
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        flags = super().flags(index)
+        if index.isValid():
+            flags |= Qt.ItemFlag.ItemIsDragEnabled
+            flags |= Qt.ItemFlag.ItemNeverHasChildren
+        return flags
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        return not parent.isValid() and self._fetched < len(self._rows)
+
+    def fetchMore(self, parent: QModelIndex):
+        if self.canFetchMore(parent):
+            self._fetchUpTo(self._fetched + self._fetchSize - 1)
+
+    def _fetchUpTo(self, row: int):
+        last = min(row, len(self._rows) - 1)
+        if last < self._fetched:
+            return
+
+        self.beginInsertRows(_rootIndex, self._fetched, last)
+        self._fetched = last + 1
+        self.endInsertRows()
+
+    def indexOfValue(self, text: str) -> QModelIndex:
+        """Return index of the value, not fetched rows are fetched if needed."""
+        if (pos := self._index.find(text)) is None or pos not in self._rows:
+            return _rootIndex
+
+        row = pos - self._rows.start
+        self._fetchUpTo(row)
+        return self.index(row, 0)
+
+
+class PrefixCompletionModel(PossibleTagsModel):
+    """Values starting with `prefix`, found by the index.
+
+    `QCompleter` fetches all rows of the model to filter them,
+    so it should use `QCompleter.UnfilteredPopupCompletion`
+    and only matching rows are exposed, none for an empty prefix.
+    """
+
+    def __init__(
+        self,
+        index: SortedStringIndex | None = None,
+        parent: QObject | None = None,
+        **kwargs,
+    ):
+        self._prefix = ''
+        super().__init__(index, parent, **kwargs)
+
+    @property
+    def prefix(self) -> str:
+        return self._prefix
+
+    def setPrefix(self, prefix: str):
+        if prefix == self._prefix:
+            return
+        self.beginResetModel()
+        self._prefix = prefix
+        self._resetRows()
+        self.endResetModel()
+
+    def _selectRows(self) -> range:
+        return self._index.prefixRange(self._prefix) if self._prefix else range(0)
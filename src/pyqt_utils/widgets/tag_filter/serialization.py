@@ -0,0 +1,324 @@
+"""Compact serialization of tag filter trees, safe for untrusted data.
+
+Binary format: header `MAGIC + VERSION` followed by trees in prefix order.
+Each node is an opcode byte:
+
+- `LEAF` + varint length + utf-8 tag name,
+- `OR`/`AND` + varint number of children, then children,
+- `NOT` followed by the single child.
+
+Json format: `{"version": VERSION, "tree": node}`, where a leaf is a string
+and a sequence is a list: `["AND", child, ...]`.
+"""
+
+from __future__ import annotations
+
+import json
+from enum import IntEnum
+from typing import TYPE_CHECKING, BinaryIO
+
+from pyqt_utils.widgets.tag_filter.nodes import (
+    TagFilterAndNode,
+    TagFilterExcludeNode,
+    TagFilterNode,
+    TagFilterOrNode,
+    TagFilterSequenceNode,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+MAGIC = b'TGF'
+VERSION = 1
+HEADER = MAGIC + bytes([VERSION])
+
+MAX_DEPTH = 500
+MAX_TAG_SIZE = 64 * 1024
+
+_VARINT_VALUE = 0x7F
+_VARINT_CONTINUE = 0x80
+_VARINT_MAX_SHIFT = 63
+
+
+class _Opcode(IntEnum):
+    LEAF = 0
+    OR = 1
+    AND = 2
+    NOT = 3
+
+
+_opcodeToType: dict[int, type[TagFilterSequenceNode]] = {
+    _Opcode.OR: TagFilterOrNode,
+    _Opcode.AND: TagFilterAndNode,
+    _Opcode.NOT: TagFilterExcludeNode,
+}
+_typeToOpcode = {t: op for op, t in _opcodeToType.items()}
+_nameToType = {t.TAG_NAME: t for t in _opcodeToType.values()}
+
+
+class TagFilterFormatError(ValueError):
+    pass
+
+
+def dumps(node: TagFilterNode) -> bytes:
+    buffer = bytearray(HEADER)
+    _encode(node, buffer)
+    return bytes(buffer)
+
+
+def dump(nodes: Iterable[TagFilterNode], stream: BinaryIO):
+    """Write header and all trees to the stream, see `load`."""
+    stream.write(HEADER)
+    buffer = bytearray()
+    for node in nodes:
+        _encode(node, buffer)
+        stream.write(buffer)
+        buffer.clear()
+
+
+def loads(data: bytes) -> TagFilterNode:
+    reader = _BytesReader(data)
+    _readHeader(reader)
+    node = _decode(reader)
+    if not reader.atEnd():
+        msg = "Unexpected data after the tree"
+        raise TagFilterFormatError(msg)
+    return node
+
+
+def load(stream: BinaryIO) -> Iterator[TagFilterNode]:
+    """Yield trees one by one, while reading the stream."""
+    reader = _StreamReader(stream)
+    _readHeader(reader)
+    while not reader.atEnd():
+        yield _decode(reader)
+
+
+def _encode(node: TagFilterNode, buffer: bytearray):
+    """Encode a tree without recursion, trees rejected by `_decode` are not written.
+
+    The stack contains nodes with their depth.
+    """
+    stack = [(node, 0)]
+    while stack:
+        node, depth = stack.pop()
+        match node:
+            case TagFilterExcludeNode():
+                _checkDepth(depth)
+                buffer.append(_Opcode.NOT)
+                stack.append((node.content, depth + 1))
+            case TagFilterSequenceNode():
+                _checkDepth(depth)
+                buffer.append(_getOpcode(node))
+                _writeVarint(buffer, len(node.tagList))
+                stack.extend((child, depth + 1) for child in reversed(node.tagList))
+            case _:
+                encoded = node.tagName.encode()
+                buffer.append(_Opcode.LEAF)
+                _writeVarint(buffer, len(encoded))
+                buffer += encoded
+
+
+def _checkDepth(depth: int):
+    """Check depth of a sequence node, the same limit is used by all formats."""
+    if depth >= MAX_DEPTH:
+        msg = f"Tree depth exceeds limit {MAX_DEPTH}"
+        raise TagFilterFormatError(msg)
+
+
+def _getOpcode(node: TagFilterSequenceNode) -> int:
+    if (opcode := _typeToOpcode.get(type(node))) is None:
+        msg = f"Unsupported node type: {type(node)}"
+        raise TypeError(msg)
+    return opcode
+
+
+def _writeVarint(buffer: bytearray, value: int):
+    while value > _VARINT_VALUE:
+        buffer.append(value & _VARINT_VALUE | _VARINT_CONTINUE)
+        value >>= 7
+    buffer.append(value)
+
+
+class _BytesReader:
+    def __init__(self, data: bytes):
+        self._data = memoryview(data)
+        self._pos = 0
+
+    def read(self, size: int) -> bytes:
+        end = self._pos + size
+        if end > len(self._data):
+            msg = "Unexpected end of data"
+            raise TagFilterFormatError(msg)
+        chunk = self._data[self._pos : end].tobytes()
+        self._pos = end
+        return chunk
+
+    def readByte(self) -> int:
+        if self._pos >= len(self._data):
+            msg = "Unexpected end of data"
+            raise TagFilterFormatError(msg)
+        self._pos += 1
+        return self._data[self._pos - 1]
+
+    def atEnd(self) -> bool:
+        return self._pos >= len(self._data)
+
+
+class _StreamReader:
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+        self._peeked = b''
+
+    def read(self, size: int) -> bytes:
+        chunk = self._peeked + self._stream.read(size - len(self._peeked))
+        self._peeked = b''
+        if len(chunk) != size:
+            msg = "Unexpected end of stream"
+            raise TagFilterFormatError(msg)
+        return chunk
+
+    def readByte(self) -> int:
+        return self.read(1)[0]
+
+    def atEnd(self) -> bool:
+        if not self._peeked:
+            self._peeked = self._stream.read(1)
+        return not self._peeked
+
+
+def _readHeader(reader: _BytesReader | _StreamReader):
+    magic, version = reader.read(len(MAGIC)), reader.readByte()
+    if magic != MAGIC:
+        msg = "Data is not a serialized tag filter"
+        raise TagFilterFormatError(msg)
+    if version != VERSION:
+        msg = f"Unsupported version: {version}, expected {VERSION}"
+        raise TagFilterFormatError(msg)
+
+
+def _readVarint(reader: _BytesReader | _StreamReader) -> int:
+    value = shift = 0
+    while (byte := reader.readByte()) & _VARINT_CONTINUE:
+        value |= (byte & _VARINT_VALUE) << shift
+        shift += 7
+        if shift > _VARINT_MAX_SHIFT:
+            msg = "Too big number"
+            raise TagFilterFormatError(msg)
+    return value | byte << shift
+
+
+def _decode(reader: _BytesReader | _StreamReader) -> TagFilterNode:
+    """Decode a tree without recursion.
+
+    The stack contains a sequence type, expected number of children
+    and already decoded children.
+    """
+    stack: list[tuple[type[TagFilterSequenceNode], int, list[TagFilterNode]]] = []
+    while True:
+        match opcode := reader.readByte():
+            case _Opcode.LEAF:
+                size = _readVarint(reader)
+                if size > MAX_TAG_SIZE:
+                    msg = f"Tag size {size} exceeds limit {MAX_TAG_SIZE}"
+                    raise TagFilterFormatError(msg)
+                try:
+                    node = TagFilterNode(reader.read(size).decode())
+                except UnicodeDecodeError as e:
+                    raise TagFilterFormatError(str(e)) from e
+
+            case _Opcode.OR | _Opcode.AND | _Opcode.NOT:
+                _checkDepth(len(stack))
+                nodeType = _opcodeToType[opcode]
+                count = 1 if opcode == _Opcode.NOT else _readVarint(reader)
+                if count:
+                    stack.append((nodeType, count, []))
+                    continue
+                node = _createSequence(nodeType, [])
+
+            case _:
+                msg = f"Unknown opcode: {opcode}"
+                raise TagFilterFormatError(msg)
+
+        while stack:
+            nodeType, count, children = stack[-1]
+            children.append(node)
+            if len(children) < count:
+                break
+            stack.pop()
+            node = _createSequence(nodeType, children)
+        else:
+            return node
+
+
+def _createSequence(
+    nodeType: type[TagFilterSequenceNode], children: list[TagFilterNode]
+) -> TagFilterNode:
+    if nodeType is TagFilterExcludeNode:
+        return TagFilterExcludeNode(children[0])
+    return nodeType(tagList=children)
+
+
+def toJson(node: TagFilterNode) -> dict:
+    return {'version': VERSION, 'tree': _toJsonNode(node)}
+
+
+def _toJsonNode(node: TagFilterNode) -> str | list:
+    """Convert a tree without recursion, trees rejected by `fromJson` are not written.
+
+    The stack contains nodes with their depth and the list of their parent.
+    """
+    root: list[str | list] = []
+    stack: list[tuple[TagFilterNode, int, list[str | list]]] = [(node, 0, root)]
+    while stack:
+        node, depth, parentList = stack.pop()
+        match node:
+            case TagFilterSequenceNode():
+                _checkDepth(depth)
+                _getOpcode(node)  # check if type is supported
+                children: list[str | list] = [node.TAG_NAME]
+                parentList.append(children)
+                stack.extend((t, depth + 1, children) for t in reversed(node.tagList))
+            case _:
+                parentList.append(node.tagName)
+    return root[0]
+
+
+def fromJson(data: object) -> TagFilterNode:
+    match data:
+        case {'version': 1, 'tree': tree}:
+            return _fromJsonNode(tree, 0)
+        case {'version': version}:
+            msg = f"Unsupported version: {version}, expected {VERSION}"
+            raise TagFilterFormatError(msg)
+        case _:
+            msg = "Data is not a serialized tag filter"
+            raise TagFilterFormatError(msg)
+
+
+def _fromJsonNode(data: object, depth: int) -> TagFilterNode:
+    if isinstance(data, str):
+        return TagFilterNode(data)
+    _checkDepth(depth)
+
+    match data:
+        case ['NOT', content]:
+            return TagFilterExcludeNode(_fromJsonNode(content, depth + 1))
+        case [str(name), *children] if name in _nameToType and name != 'NOT':
+            nodes = [_fromJsonNode(c, depth + 1) for c in children]
+            return _nameToType[name](tagList=nodes)
+        case _:
+            msg = f"Invalid node: {data!r:.100}"
+            raise TagFilterFormatError(msg)
+
+
+def dumpsJson(node: TagFilterNode) -> str:
+    return json.dumps(toJson(node), ensure_ascii=False, separators=(',', ':'))
+
+
+def loadsJson(text: str | bytes) -> TagFilterNode:
+    try:
+        data = json.loads(text)
+    except (ValueError, RecursionError) as e:
+        raise TagFilterFormatError(str(e)) from e
+    return fromJson(data)
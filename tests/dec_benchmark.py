@@ -0,0 +1,74 @@
+"""Compare per-call overhead of `decoratorForSlot` with the previous call path.
+
+Run: python tests/dec_benchmark.py
+"""
+
+import timeit
+
+from decorator import decorator as baseDecorator
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from pyqt_utils.python.decorators import decoratorForSlot
+
+NUMBER = 200_000
+
+
+def passThrough(fun, *args, **kwargs):
+    return fun(*args, **kwargs)
+
+
+def lessArgAttempt(fun, *args, **kwargs):
+    while True:
+        try:
+            return fun(*args, **kwargs)
+        except TypeError as e:
+            if e.args and 'positional argument' in e.args[0] and args:
+                args = args[:-1]
+            else:
+                raise
+
+
+fastDec = decoratorForSlot(passThrough)
+legacyDec = baseDecorator(passThrough, kwsyntax=True)
+legacyLessArgDec = baseDecorator(lessArgAttempt, kwsyntax=True)
+
+
+def onValue(value):
+    return value
+
+
+def legacyDecorate(fun):
+    """Call path used before computing the number of arguments in advance."""
+    return legacyDec(legacyLessArgDec(fun))
+
+
+class Emitter(QObject):
+    sig = pyqtSignal(int, str)
+
+
+def measure(name: str, fun, *args):
+    seconds = min(timeit.repeat(lambda: fun(*args), number=NUMBER, repeat=5))
+    print(f'{name:<40} {seconds / NUMBER * 1e9:8.0f} ns/call')  # noqa: T201
+
+
+def measureSignal(name: str, slot):
+    emitter = Emitter()
+    emitter.sig.connect(slot)
+    measure(name, emitter.sig.emit, 1, 'text')
+
+
+def main():
+    fast = fastDec(onValue)
+    legacy = legacyDecorate(onValue)
+
+    measure('plain call', onValue, 1)
+    measure('legacy, matching arguments', legacy, 1)
+    measure('decoratorForSlot, matching arguments', fast, 1)
+    measure('legacy, one argument too many', legacy, 1, 'text')
+    measure('decoratorForSlot, one argument too many', fast, 1, 'text')
+    measureSignal('signal, legacy', legacy)
+    measureSignal('signal, decoratorForSlot', fast)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,24 @@
 import inspect
 import logging
+import threading
+import time
+from functools import partial
 
+import pytest
 from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
 
 from pyqt_utils.python.decorators import (
+    SingleCallScope,
+    decoratorForSlot,
     entryExitDecFactory,
     exceptionDecFactory,
+    isDebugDecorators,
     lessArgDec,
+    setDebugDecorators,
+    singleCallDecFactory,
     timeDecFactory,
 )
+from pyqt_utils.python.timing_stats import TimingRegistry, timingRegistry
 
 logger = logging.getLogger(__name__)
 specialLogger = logging.getLogger(__name__ + '.special')
@@ -128,6 +138,320 @@ class TestSlotClass(QObject):
         pass
 
 
+def testLessArgDec():
+    class Receiver:
+        def onValue(self, value):
+            return value
+
+    def onPair(first, second, *, flag=False):
+        return first, second, flag
+
+    assert lessArgDec(Receiver.onValue)(Receiver(), 1, 'extra') == 1
+    assert lessArgDec(Receiver().onValue)(1, 'extra') == 1
+    assert lessArgDec(partial(onPair, 0))(1, 2, flag=True) == (0, 1, True)
+
+    def onAny(*args):
+        return args
+
+    assert lessArgDec(onAny) is onAny
+
+
+@decoratorForSlot
+def recordingDec(fun, *args, **kwargs):
+    recordedCalls.append(args)
+    return fun(*args, **kwargs)
+
+
+@decoratorForSlot
+def wrappingDec(fun, prefix='<', suffix='>', *args, **kwargs):
+    return f'{prefix}{fun(*args, **kwargs)}{suffix}'
+
+
+@decoratorForSlot
+def generatorDec(fun, *args, **kwargs):
+    yield fun(*args, **kwargs)
+
+
+recordedCalls: list[tuple] = []
+
+
+class ValueSignal(QObject):
+    sig = pyqtSignal(int, str)
+
+
+def testDecoratorForSlotDropsSurplusArgs():
+    recordedCalls.clear()
+    received = []
+
+    @recordingDec
+    def onValue(value):
+        received.append(value)
+
+    onValue(1, 'surplus')
+    emitter = ValueSignal()
+    emitter.sig.connect(onValue)
+    emitter.sig.emit(2, 'surplus')
+
+    assert received == [1, 2]
+    # arguments are dropped before the decorator is called
+    assert recordedCalls == [(1,), (2,)]
+    assert onValue.__name__ == 'onValue'
+
+
+def testDecoratorForSlotFactoryExtras():
+    def identity(text):
+        return text
+
+    assert wrappingDec(identity)('a', 'surplus') == '<a>'
+    assert wrappingDec()(identity)('a') == '<a>'
+    assert wrappingDec(suffix='!')(identity)('a', 'surplus') == '<a!'
+    assert wrappingDec(prefix='[', suffix=']')(identity)('a') == '[a]'
+
+
+class NoSignature:
+    """Callable, which signature is not available for `inspect`."""
+
+    __signature__ = 0  # invalid, `inspect.signature` raises TypeError
+
+    def __call__(self, value):
+        return value
+
+
+def testDecoratorForSlotWithoutSignature():
+    with pytest.raises(TypeError, match='__signature__'):
+        inspect.signature(NoSignature())
+
+    recordedCalls.clear()
+    # arguments are dropped after TypeError
+    assert recordingDec(NoSignature())(1, 'surplus') == 1
+    assert recordedCalls == [(1, 'surplus')]
+    assert recordingDec(max)(1, 3) == max(1, 3)
+    # decorator library is used for generator decorators
+    assert list(generatorDec(NoSignature())(1, 'surplus')) == [1]
+    assert list(generatorDec(len)('abc')) == [len('abc')]
+
+
+def testTimeDecStats():
+    calls = 100
+    registry = TimingRegistry()
+
+    @timeDecFactory(stats=registry)
+    def onValue(value):
+        return value
+
+    assert [onValue(i) for i in range(calls)] == list(range(calls))
+    [stats] = registry.snapshot()
+    assert stats.count == calls
+    assert 0 < stats.minNs <= stats.percentileNs(50) <= stats.maxNs
+    assert stats.name.endswith('onValue')
+
+    registry.reset()
+    assert registry.dump() == ''
+
+
+def testTimeDecDefaultRegistry():
+    calls = 10
+
+    @timeDecFactory(stats=True)
+    def onDefaultStats(value):
+        return value
+
+    assert [onDefaultStats(i) for i in range(calls)] == list(range(calls))
+    [stats] = [
+        s for s in timingRegistry.snapshot() if s.name.endswith('onDefaultStats')
+    ]
+    assert stats.count == calls
+
+
+def testTimingRegistryReportInterval(caplog):
+    def onValue():
+        pass
+
+    registry = TimingRegistry(reportInterval=10, reportLogger=specialLogger)
+    startNs = time.perf_counter_ns()
+    intervalNs = 10 * 10**9
+    caplog.set_level(logging.INFO, specialLogger.name)
+
+    nowOffsets = [0, intervalNs + 1, intervalNs + 2]
+    registry.record(onValue, 100, startNs + nowOffsets[0])
+    assert not caplog.records
+    # the next report is after another interval since the last one
+    for offset in nowOffsets[1:]:
+        registry.record(onValue, 100, startNs + offset)
+    (record,) = caplog.records
+    assert record.levelno == logging.INFO
+    assert f'count={len(nowOffsets) - 1}' in record.getMessage()
+    assert record.getMessage().startswith("Timing stats:\n")
+
+    registry.setReportInterval(None)
+    registry.record(onValue, 100, startNs + 3 * intervalNs)
+    assert len(caplog.records) == 1
+    assert registry.snapshot()[0].count == len(nowOffsets) + 1
+
+
+def testExceptionDecLevel(caplog):
+    @exceptionDecFactory(logger=specialLogger, level=logging.WARNING)
+    def onError():
+        msg = "failed"
+        raise ValueError(msg)
+
+    with pytest.raises(ValueError, match='failed'):
+        onError()
+
+    (record,) = caplog.records
+    assert (record.name, record.levelno) == (specialLogger.name, logging.WARNING)
+    assert record.getMessage() == "Unknown exception"
+    assert record.exc_info is not None
+    assert record.exc_info[0] is ValueError
+
+
+def testDebugDecorators():
+    def onValue(value):
+        return value
+
+    enabled = isDebugDecorators()
+    try:
+        setDebugDecorators(False)
+        # surplus arguments are dropped, even if the decorator is skipped
+        decorated = entryExitDecFactory()(onValue)
+        assert decorated(1, 'surplus') == 1
+        assert decorated.__wrapped__ is onValue
+        setDebugDecorators(True)
+        assert entryExitDecFactory()(onValue) is not onValue
+        assert entryExitDecFactory()(onValue)(1) == 1
+    finally:
+        setDebugDecorators(enabled)
+
+
+def testDebugDecoratorsDisabledSlot():
+    enabled = isDebugDecorators()
+    try:
+        setDebugDecorators(False)
+
+        class Sender(QObject):
+            sig = pyqtSignal(int, str)
+
+            def __init__(self):
+                super().__init__()
+                self.values: list[int] = []
+                self.sig.connect(self.onValue)
+
+            @entryExitDecFactory()
+            def onValue(self, value):
+                self.values.append(value)
+
+        sender = Sender()
+    finally:
+        setDebugDecorators(enabled)
+
+    sender.sig.emit(1, 'surplus')
+    assert sender.values == [1]
+
+
+def testUnknownDecoratorOptions():
+    with pytest.raises(TypeError, match='attrName'):
+        singleCallDecFactory(attrName='running')  # pyright: ignore[reportCallIssue]
+    with pytest.raises(TypeError, match='unknown options'):
+        timeDecFactory(stat=True)(len)  # pyright: ignore[reportCallIssue]
+
+
+def testTimeDecUnhashableStats():
+    class UnhashableRegistry(TimingRegistry):
+        __hash__ = None  # type: ignore[assignment]
+
+    registry = UnhashableRegistry()
+
+    @timeDecFactory(stats=registry)
+    def onValue(value):
+        return value
+
+    assert onValue(1) == 1
+    (stats,) = registry.snapshot()
+    assert stats.count == 1
+
+
+class Counter:
+    def __init__(self, other: 'Counter | None' = None):
+        self.values: list[int] = []
+        self.other = other
+
+    @singleCallDecFactory(callingDefaultValue=-1)
+    def onValue(self, value):
+        self.values.append(value)
+        if self.other is not None:
+            self.other.onValue(value)
+        return self.onValue(value + 1)
+
+    @singleCallDecFactory(coalesce=True)
+    def onCoalesced(self, value):
+        self.values.append(value)
+        if value == 0:
+            self.onCoalesced(1)
+            self.onCoalesced(2)
+        if value < 0:
+            self.onCoalesced(99)
+            msg = "failed"
+            raise ValueError(msg)
+
+
+def testSingleCallDec():
+    # recursion is blocked, but calls of another instance are not
+    other = Counter()
+    counter = Counter(other)
+    assert counter.onValue(0) == -1
+    assert counter.values == [0]
+    assert other.values == [0]
+
+    @singleCallDecFactory(scope=SingleCallScope.FUNCTION, callingDefaultValue=-1)
+    def onRecursive(value):
+        return onRecursive(value + 1)
+
+    assert onRecursive(0) == -1
+
+
+def testSingleCallDecCoalesce():
+    # only the last blocked call is made after the running one
+    counter = Counter()
+    counter.onCoalesced(0)
+    assert counter.values == [0, 2]
+
+    # blocked call is dropped, if the running one fails
+    counter.values.clear()
+    with pytest.raises(ValueError, match='failed'):
+        counter.onCoalesced(-1)
+    counter.onCoalesced(1)
+    assert counter.values == [-1, 1]
+
+
+@pytest.mark.parametrize(
+    ('scope', 'concurrentResult'),
+    [(SingleCallScope.INSTANCE, -1), (SingleCallScope.THREAD, 'done')],
+)
+def testSingleCallDecThreads(scope, concurrentResult):
+    entered = threading.Event()
+    release = threading.Event()
+
+    class Worker:
+        @singleCallDecFactory(scope=scope, callingDefaultValue=-1)
+        def onWork(self, wait):
+            if wait:
+                entered.set()
+                release.wait(5)
+            return 'done'
+
+    worker = Worker()
+    results = []
+    thread = threading.Thread(target=lambda: results.append(worker.onWork(True)))
+    thread.start()
+    try:
+        assert entered.wait(5)
+        assert worker.onWork(False) == concurrentResult
+    finally:
+        release.set()
+        thread.join(5)
+    assert results == ['done']
+
+
 def runAllFunctions():
     testObj = TestClass()
     for fun in TestClass.__dict__.values():
@@ -0,0 +1,489 @@
+import asyncio
+import gc
+import logging
+import signal
+import stat
+import subprocess
+import threading
+import time
+import weakref
+
+import pytest
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+
+from pyqt_utils.python import process_async
+from pyqt_utils.python.log_batching import (
+    LineBatcher,
+    LogBatchConfig,
+    OverflowPolicy,
+    stopQueueListeners,
+)
+from pyqt_utils.python.process_async import (
+    BinaryOutputReader,
+    LineBuffer,
+    OutputReader,
+    OutputReaderHub,
+    OutputReaderLogger,
+    PermissionFixReader,
+    ProcessPool,
+    getReaderLogger,
+    openProcessWrapper,
+)
+from pyqt_utils.python.process_asyncio import (
+    AsyncOutputReader,
+    openProcessAsyncio,
+    runProcessAsyncio,
+)
+from pyqt_utils.python.process_stats import ProcessStatsRegistry
+from pyqt_utils.qobjects.qt_output_reader import runProcessQt
+
+
+class CollectingReader(AsyncOutputReader):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.output: list[str] = []
+        self.errors: list[str] = []
+        collectingReaders.append(self)
+
+    def processOutput(self, line: str):
+        self.output.append(line)
+
+    def processError(self, line: str):
+        self.errors.append(line)
+
+
+collectingReaders: list[CollectingReader] = []
+EXIT_CODE = 3
+
+
+def testRunProcessAsyncio():
+    collectingReaders.clear()
+    script = f'echo out1; echo err1 >&2; echo; echo out2; exit {EXIT_CODE}'
+    returnCode = asyncio.run(
+        runProcessAsyncio(['sh', '-c', script], reader=CollectingReader)
+    )
+
+    assert returnCode == EXIT_CODE
+    (reader,) = collectingReaders
+    assert reader.output == ['out1', 'out2']
+    assert reader.errors == ['err1']
+
+
+def testRunProcessAsyncioLongLine():
+    collectingReaders.clear()
+    script = 'head -c 200000 /dev/zero | tr "\\0" x; echo; echo end'
+    returnCode = asyncio.run(
+        runProcessAsyncio(
+            ['sh', '-c', script], reader=CollectingReader, maxLineLength=65536
+        )
+    )
+
+    assert returnCode == 0
+    (reader,) = collectingReaders
+    assert [len(line) for line in reader.output] == [65536] * 3 + [3392, 3]
+
+
+def testRunProcessAsyncioConcurrently():
+    async def runAll():
+        return await asyncio.gather(
+            *(runProcessAsyncio(['sh', '-c', f'exit {i}']) for i in range(20))
+        )
+
+    assert asyncio.run(runAll()) == list(range(20))
+
+
+def testAsyncOutputReaderHookError():
+    class FailingReader(AsyncOutputReader):
+        def processOutput(self, line: str):
+            raise ValueError(line)
+
+    sleep = 10
+
+    async def run():
+        process = await openProcessAsyncio(
+            ['sh', '-c', f'echo out; exec sleep {sleep}']
+        )
+        with pytest.raises(ValueError, match='out'):
+            await FailingReader(process, []).run()
+        return process
+
+    start = time.monotonic()
+    process = asyncio.run(run())
+    # the process is killed and waited for, instead of reading its stderr
+    assert process.returncode == -signal.SIGKILL
+    assert time.monotonic() - start < sleep
+
+
+def testRunProcessAsyncioMissingProgram():
+    assert asyncio.run(runProcessAsyncio(['not-existing-program-name'])) is None
+
+
+class StreamingReader(OutputReader):
+    def __init__(self, *args, **kwargs):
+        self.output: list[str] = []
+        self.outputCondition = threading.Condition()
+        super().__init__(*args, **kwargs)
+
+    def processOutput(self, line: str):
+        with self.outputCondition:
+            self.output.append(line)
+            self.outputCondition.notify_all()
+
+    def waitForOutput(self, count: int, timeout: float) -> list[str]:
+        """Wait until at least `count` lines are read, return copy of them."""
+        with self.outputCondition:
+            self.outputCondition.wait_for(lambda: len(self.output) >= count, timeout)
+            return self.output.copy()
+
+
+def testOutputReaderStreamsLines():
+    script = 'echo first; read _; echo second'
+    process = openProcessWrapper(['sh', '-c', script], stdin=subprocess.PIPE)
+    reader = StreamingReader(process, maxLineLength=4)
+
+    # the first line is split, the second one is not written until stdin is closed
+    assert reader.waitForOutput(2, 5) == ['firs', 't']
+    assert process.poll() is None
+
+    assert process.stdin is not None
+    process.stdin.close()
+    process.wait(5)
+    reader.outputThread.join(5)
+    assert reader.output == ['firs', 't', 'seco', 'nd']
+
+
+def testProcessPoolOrder():
+    finished: list[str] = []
+    with ProcessPool(maxRunning=1, reader=None) as pool:
+        pool.submit(['sleep', '0.2'])
+        for name, priority in (
+            ('low', 1),
+            ('high', -1),
+            ('normal1', 0),
+            ('normal2', 0),
+        ):
+            future = pool.submit(['true'], priority=priority)
+            future.add_done_callback(lambda _f, name=name: finished.append(name))
+        assert pool.runningCount == 1
+
+    assert finished == ['high', 'normal1', 'normal2', 'low']
+
+
+def testProcessPoolReaderError():
+    hub = OutputReaderHub()
+    with ProcessPool(reader=BinaryOutputReader, hub=hub) as pool:
+        future = pool.submit(['sleep', '10'])
+        assert isinstance(future.exception(5), TypeError)
+        assert pool.runningCount == 0
+    hub.close()
+
+
+def testProcessPoolTimeoutAndCancel():
+    with ProcessPool(maxRunning=1, reader=StreamingReader) as pool:
+        timedOut = pool.submit(['sleep', '10'], timeout=0.1)
+        waiting = pool.submit(['sleep', '10'])
+        assert pool.cancel(waiting)
+        running = pool.submit(['sleep', '10'])
+        with pytest.raises(subprocess.TimeoutExpired):
+            timedOut.result(5)
+        assert pool.cancel(running)
+
+    assert waiting.cancelled()
+    assert running.result() == -signal.SIGTERM
+
+
+def testProcessPoolCancelBeforeStartError(monkeypatch):
+    def failingOpen(*_args, **_kwargs):
+        (future,) = pool._running  # noqa: SLF001 # SKIP: job not returned yet
+        assert pool.cancel(future)
+        msg = "Cannot start"
+        raise OSError(msg)
+
+    monkeypatch.setattr(process_async, 'openProcessWrapper', failingOpen)
+    with ProcessPool(reader=None) as pool:
+        future = pool.submit(['true'])
+        assert isinstance(future.exception(5), OSError)
+    assert not pool._cancelRequested  # noqa: SLF001 # SKIP: no public view
+
+
+def testProcessPoolStats():
+    registry = ProcessStatsRegistry()
+    script = 'i=0; while [ $i -lt 1000 ]; do i=$((i+1)); done'
+    with ProcessPool(maxRunning=2, reader=OutputReader, statsRegistry=registry) as pool:
+        futures = [pool.submit(['sh', '-c', script]) for _ in range(4)]
+        assert [future.result(5) for future in futures] == [0] * len(futures)
+
+    assert len(registry.recent) == len(futures)
+    # processes are reaped only by the stats waiter, so usage is never lost
+    for stats in registry.recent:
+        assert stats.maxRss
+        assert stats.userTime is not None
+        assert stats.returnCode == 0
+
+
+def testOutputReaderHub():
+    hub = OutputReaderHub()
+    script = 'echo out; printf "a\\nlong-line\\npartial"; echo err >&2'
+    processes = [openProcessWrapper(['sh', '-c', script]) for _ in range(20)]
+    readers = [StreamingReader(p, hub=hub, maxLineLength=5) for p in processes]
+    hub.close()
+
+    for reader in readers:
+        assert reader.join(5)
+        assert reader.output == ['out', 'a', 'long-', 'line', 'parti', 'al']
+
+
+def testLineBuffer():
+    buffer = LineBuffer(maxLineLength=4)
+    encoded = 'ąb\n\n  c  \r\nlonger'.encode()
+    lines = [
+        line for i in range(len(encoded)) for line in buffer.feed(encoded[i : i + 1])
+    ]
+    assert lines == ['ąb', 'c', 'long']
+    assert buffer.flush() == ['er']
+
+
+def runQtReader(*args, **kwargs) -> tuple[list[list[str]], list[list[str]], list[int]]:
+    """Run process by `runProcessQt`, return output and error batches and codes."""
+    app = QApplication.instance() or QApplication([])
+    reader = runProcessQt(*args, **kwargs)
+    assert reader is not None
+
+    outputBatches: list[list[str]] = []
+    errorBatches: list[list[str]] = []
+    returnCodes: list[int] = []
+    reader.outputReceived.connect(outputBatches.append)
+    reader.errorReceived.connect(errorBatches.append)
+    reader.finished.connect(returnCodes.append)
+    reader.finished.connect(app.quit)
+    QTimer.singleShot(5000, app.quit)
+    app.exec_()
+    return outputBatches, errorBatches, returnCodes
+
+
+def testQtOutputReader():
+    script = f'seq 3; echo err >&2; sleep 0.2; echo last; exit {EXIT_CODE}'
+    outputBatches, errorBatches, returnCodes = runQtReader(['sh', '-c', script])
+
+    assert returnCodes == [EXIT_CODE]
+    # lines written together are batched, the late one is emitted separately
+    assert outputBatches[-1] == ['last']
+    assert [line for batch in outputBatches for line in batch] == [
+        '1',
+        '2',
+        '3',
+        'last',
+    ]
+    assert errorBatches == [['err']]
+
+
+def testRunProcessQtPassesReaderOptions():
+    registry = ProcessStatsRegistry()
+    maxBatchSize = 2
+    # the timer never flushes, so only full batches and the final flush are emitted
+    outputBatches, errorBatches, returnCodes = runQtReader(
+        ['sh', '-c', 'printf "12\\n34\\n5"'],
+        flushInterval=60_000,
+        maxBatchSize=maxBatchSize,
+        maxLineLength=1,
+        statsRegistry=registry,
+    )
+
+    assert returnCodes == [0]
+    assert outputBatches == [['1', '2'], ['3', '4'], ['5']]
+    assert not errorBatches
+    (programStats,) = registry.summary()
+    assert (programStats.program, programStats.count) == ('sh', 1)
+
+
+def testPermissionFixReader(tmp_path):
+    script = tmp_path / 'script.sh'
+    script.write_text('#!/bin/sh\necho executed\n')
+    script.chmod(0o644)
+
+    cmd = f'{script}; {script}; echo done'
+    process = openProcessWrapper(cmd, shell=True)  # noqa: S604
+    reader = PermissionFixReader(process)
+    assert reader.join(5)
+    process.wait(5)
+
+    assert reader.retries == 1
+    assert script.stat().st_mode & stat.S_IXUSR
+
+
+def testPermissionFixReaderKeepsLaunchOptions(tmp_path):
+    script = tmp_path / 'script.sh'
+    script.write_text('#!/bin/sh\necho "executed in $PWD"\n')
+    script.chmod(0o644)
+    output: list[str] = []
+    errors: list[str] = []
+
+    class CollectingFixReader(PermissionFixReader):
+        def processOutput(self, line: str):
+            output.append(line)
+
+        def processError(self, line: str):
+            errors.append(line)
+            super().processError(line)
+
+    launch = {'cwd': tmp_path, 'env': {'SCRIPT': str(script)}}
+    process = openProcessWrapper('"$SCRIPT"', shell=True, **launch)  # noqa: S604
+    reader = CollectingFixReader(process)
+    assert reader.join(5)
+
+    assert reader.retries == 1
+    # `cwd` and `env` are used by the relaunched process
+    assert output == [f'executed in {tmp_path}']
+    assert len(errors) == 1
+
+
+def testLineBatcher():
+    emitted: list[str] = []
+    config = LogBatchConfig(maxLines=3, maxDelay=60, maxRate=5)
+    batcher = LineBatcher(emitted.append, config)
+    for i in range(8):
+        batcher.add(str(i))
+    batcher.flush()
+    assert emitted == ['0\n1\n2', '3\n4\n[3 lines skipped]']
+
+    emitted.clear()
+    config = LogBatchConfig(maxDelay=0.05, maxRate=1, overflow=OverflowPolicy.SAMPLE)
+    batcher = LineBatcher(emitted.append, config._replace(sampleEvery=2))
+    for i in range(6):
+        batcher.add(str(i))
+    time.sleep(0.5)
+    assert emitted == ['0\n2\n4\n[3 lines skipped]']
+
+
+def testOutputReaderLoggerBatchAndQueue(caplog):
+    caplog.set_level(logging.DEBUG)
+    process = openProcessWrapper(['seq', '5'])
+    reader = OutputReaderLogger(process, batch=LogBatchConfig(), useQueue=True)
+    assert reader.join(5)
+    stopQueueListeners()
+
+    records = [r for r in caplog.records if getattr(r, 'pid', None) == process.pid]
+    assert records[0].getMessage() == f'[{process.pid}] 1\n2\n3\n4\n5'
+    assert "Process finished" in records[1].getMessage()
+
+
+@pytest.mark.parametrize('useHub', [False, True])
+def testProcessStats(useHub):
+    registry = ProcessStatsRegistry()
+    hub = OutputReaderHub() if useHub else None
+    script = f'printf "1\\n22\\n333"; echo e >&2; exit {EXIT_CODE}'
+    processes = [openProcessWrapper(['sh', '-c', script]) for _ in range(2)]
+    readers = [OutputReader(p, hub=hub, statsRegistry=registry) for p in processes]
+    for process, reader in zip(processes, readers, strict=True):
+        assert reader.join(5)
+        assert process.returncode == EXIT_CODE
+    if hub is not None:
+        hub.close()
+
+    assert (stats := readers[-1].stats) is not None
+    assert (stats.outputBytes, stats.outputLines) == (8, 2)
+    assert (stats.errorBytes, stats.errorLines) == (2, 1)
+    assert stats.userTime is not None
+
+    (programStats,) = registry.summary()
+    assert programStats.program == 'sh'
+    assert (programStats.count, programStats.failures) == (2, 2)
+
+
+def testProcessStatsDoNotBlockHub():
+    registry = ProcessStatsRegistry()
+    hub = OutputReaderHub()
+    # closes its output, but keeps running
+    sleeping = openProcessWrapper(['sh', '-c', 'exec >&- 2>&-; sleep 5'])
+    sleepingReader = OutputReader(sleeping, hub=hub, statsRegistry=registry)
+    time.sleep(0.2)
+    try:
+        process = openProcessWrapper(['echo', 'ok'])
+        reader = OutputReader(process, hub=hub, statsRegistry=registry)
+        assert reader.join(1)
+        assert not sleepingReader.join(0)
+    finally:
+        sleeping.kill()
+    assert sleepingReader.join(5)
+    hub.close()
+
+    assert reader.stats is not None
+    assert sleepingReader.stats is not None
+    assert reader.stats.startTime >= sleepingReader.stats.startTime
+    assert sleeping.returncode == -signal.SIGKILL
+
+
+def testReaderLoggersAreShared():
+    handler = logging.NullHandler()
+    processes = [openProcessWrapper(['true']) for _ in range(3)]
+    readers = [OutputReaderLogger(p, logHandlers=[handler]) for p in processes]
+    for reader in readers:
+        assert reader.join(5)
+
+    assert len({reader.log.logger for reader in readers}) == 1
+    assert readers[0].log.logger.handlers == [handler]
+
+
+class CollectingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records: list[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord):
+        self.records.append(record)
+
+
+def testReaderLoggersAreReleased():
+    handler = logging.NullHandler()
+    log = weakref.ref(getReaderLogger(f'{__name__}.released', [handler]))
+    gc.collect()
+    assert log() is None
+
+
+def testReaderLoggersRespectLoggingDisable():
+    handler = CollectingHandler()
+    log = getReaderLogger(f'{__name__}.disable', [handler])
+
+    log.info('enabled')
+    logging.disable(logging.INFO)
+    try:
+        log.info('disabled')
+    finally:
+        logging.disable(logging.NOTSET)
+    log.info('enabled again')
+    assert [r.getMessage() for r in handler.records] == ['enabled', 'enabled again']
+
+
+def testQueueListenerRestarts():
+    handler = CollectingHandler()
+    log = getReaderLogger(f'{__name__}.queue', [handler], useQueue=True)
+
+    log.info('first')
+    stopQueueListeners()
+    log.info('second')
+    stopQueueListeners()
+    assert [r.getMessage() for r in handler.records] == ['first', 'second']
+
+
+class CollectingBinaryReader(BinaryOutputReader):
+    def __init__(self, *args, **kwargs):
+        self.chunks = bytearray()
+        self.errorLines: list[str] = []
+        super().__init__(*args, **kwargs)
+
+    def processOutputChunk(self, chunk: memoryview):
+        self.chunks += chunk
+
+    def processError(self, line: str):
+        self.errorLines.append(line)
+
+
+def testBinaryOutputReader():
+    script = 'head -c 100000 /dev/zero; printf "zażółć\\nx" >&2'
+    process = openProcessWrapper(['sh', '-c', script], binary=True)
+    reader = CollectingBinaryReader(process, chunkSize=4096, decodeLines=True)
+    assert reader.join(5)
+
+    assert reader.chunks == bytes(100000)
+    assert reader.errorLines == ['zażółć', 'x']
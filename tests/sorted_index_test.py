@@ -0,0 +1,103 @@
+import pytest
+
+from pyqt_utils.python.sorted_index import SortedStringIndex
+
+VALUES = ['beta', 'Alpha', 'alphabet', 'al', 'gamma', 'beta']
+
+
+def testSortedStringIndexIsSortedAndUnique():
+    index = SortedStringIndex(VALUES)
+    assert list(index) == ['Alpha', 'al', 'alphabet', 'beta', 'gamma']
+    assert len(index) == len(set(VALUES))
+    assert index[-1] == 'gamma'
+
+    index = SortedStringIndex(VALUES, caseSensitive=False)
+    assert list(index) == ['al', 'Alpha', 'alphabet', 'beta', 'gamma']
+
+
+@pytest.mark.parametrize(
+    ('caseSensitive', 'prefix', 'expected'),
+    [
+        (True, 'al', ['al', 'alphabet']),
+        (True, 'Al', ['Alpha']),
+        (True, 'AL', []),
+        (False, 'AL', ['al', 'Alpha', 'alphabet']),
+        (False, 'alpha', ['Alpha', 'alphabet']),
+        (True, '', ['Alpha', 'al', 'alphabet', 'beta', 'gamma']),
+        (True, 'z', []),
+    ],
+)
+def testSortedStringIndexPrefixSearch(caseSensitive, prefix, expected):
+    index = SortedStringIndex(VALUES, caseSensitive=caseSensitive)
+    assert [index[i] for i in index.prefixRange(prefix)] == expected
+    assert index.matches(prefix) == expected
+    assert index.hasMatch(prefix) == bool(expected)
+
+
+def testSortedStringIndexPrefixWithMaxCharacter():
+    maxChar = chr(0x10FFFF)
+    index = SortedStringIndex(['a', f'a{maxChar}', f'a{maxChar}b', 'b'])
+    assert index.matches(f'a{maxChar}') == [f'a{maxChar}', f'a{maxChar}b']
+    assert index.matches(maxChar) == []
+
+
+@pytest.mark.parametrize(
+    ('caseSensitive', 'text', 'expected'),
+    [
+        (True, 'bet', ['alphabet', 'beta']),
+        (True, 'pha', ['Alpha', 'alphabet']),
+        (True, 'A', ['Alpha']),
+        (False, 'A', ['al', 'Alpha', 'alphabet', 'beta', 'gamma']),
+        (False, 'MM', ['gamma']),
+        (True, 'ta\0ga', []),
+        (True, 'xyz', []),
+    ],
+)
+def testSortedStringIndexInfixSearch(caseSensitive, text, expected):
+    index = SortedStringIndex(VALUES, caseSensitive=caseSensitive)
+    assert [index[i] for i in index.infixMatches(text)] == expected
+    assert index.matches(text, infix=True) == expected
+    assert index.hasMatch(text, infix=True) == bool(expected)
+
+
+def testSortedStringIndexInfixReportsValueOnce():
+    index = SortedStringIndex(['aaaa', 'ba', 'c'])
+    assert index.matches('a', infix=True) == ['aaaa', 'ba']
+    # matches do not span the boundary of values
+    assert index.matches('ab', infix=True) == []
+
+
+def testSortedStringIndexExactLookup():
+    index = SortedStringIndex(VALUES)
+    assert index.find('beta') == list(index).index('beta')
+    assert index.find('BETA') is None
+    assert 'Alpha' in index
+    assert 'alpha' not in index
+    assert 1 not in index
+
+    index = SortedStringIndex(VALUES, caseSensitive=False)
+    assert index.find('BETA') == list(index).index('beta')
+    assert 'alpha' in index
+
+
+@pytest.mark.parametrize(
+    ('text', 'infix', 'expected'),
+    [
+        ('al', False, ['al', 'alphabet']),
+        ('Al', False, ['Alpha']),
+        ('AL', False, []),
+        ('ha', True, ['Alpha', 'alphabet']),
+        ('HA', True, []),
+    ],
+)
+def testCaseInsensitiveIndexMatchCase(text, infix, expected):
+    index = SortedStringIndex(VALUES, caseSensitive=False)
+    assert index.matches(text, infix=infix, matchCase=True) == expected
+    assert index.hasMatch(text, infix=infix, matchCase=True) == bool(expected)
+
+
+def testCaseInsensitiveIndexFindMatchCase():
+    index = SortedStringIndex(['Alpha', 'alpha', 'ALPHA', 'beta'], caseSensitive=False)
+    assert index[index.find('alpha', matchCase=True)] == 'alpha'
+    assert index.find('aLpha', matchCase=True) is None
+    assert index.find('aLpha') is not None
@@ -0,0 +1,227 @@
+import pytest
+from PyQt5.QtCore import QModelIndex
+from PyQt5.QtGui import QValidator
+from PyQt5.QtTest import QAbstractItemModelTester
+from PyQt5.QtWidgets import QApplication, QCompleter
+
+from pyqt_utils.python.sorted_index import SortedStringIndex
+from pyqt_utils.widgets.tag_filter.dialog import TagFilterDialog
+from pyqt_utils.widgets.tag_filter.model import TagFilterModel
+from pyqt_utils.widgets.tag_filter.model_checker import (
+    MODEL_CHECK_ENV,
+    ModelCheckMode,
+    TagFilterModelChecker,
+    createModelChecker,
+)
+from pyqt_utils.widgets.tag_filter.nodes import (
+    TagFilterAndNode,
+    TagFilterNode,
+    TagFilterOrNode,
+)
+from pyqt_utils.widgets.tag_filter.possible_tags_model import (
+    PossibleTagsModel,
+    PrefixCompletionModel,
+)
+
+
+def createModel() -> TagFilterModel:
+    """Create model with tree: a OR b OR (c AND d) OR e."""
+    return TagFilterModel(
+        TagFilterOrNode(
+            [
+                TagFilterNode('a'),
+                TagFilterNode('b'),
+                TagFilterAndNode([TagFilterNode('c'), TagFilterNode('d')]),
+                TagFilterNode('e'),
+            ]
+        )
+    )
+
+
+def recordRowSignals(model: TagFilterModel) -> list[tuple[str, str, int, int]]:
+    """Record row signals as `(signal, parent tag, first, last)`."""
+    signals = []
+
+    def recorder(name: str):
+        def record(parent: QModelIndex, first: int, last: int):
+            signals.append((name, repr(parent.internalPointer()), first, last))
+
+        return record
+
+    model.rowsInserted.connect(recorder('inserted'))
+    model.rowsRemoved.connect(recorder('removed'))
+    return signals
+
+
+def testAddManyInsertsOneBlock():
+    model = createModel()
+    _tester = QAbstractItemModelTester(model)
+    signals = recordRowSignals(model)
+    failures = []
+    model.failureCause.connect(failures.append)
+    top = model.topLevelIndex
+
+    assert model.addMany(['x', 'a', 'y', 'x'], top, 1) == len(['x', 'y'])
+    assert repr(model.topNode) == 'OR[a,x,y,b,AND[c,d],e]'
+    assert signals == [('inserted', 'OR[a,x,y,b,AND[c,d],e]', 1, 2)]
+    assert failures == ["2 tags already exist: a, x"]
+    assert [n.row for n in model.topNode.tagList] == list(range(6))
+
+    signals.clear()
+    assert model.addMany(['a', 'b'], top) == 0
+    assert not signals
+
+
+def testRemoveManyGroupsContiguousRows():
+    model = createModel()
+    _tester = QAbstractItemModelTester(model)
+    signals = recordRowSignals(model)
+    top = model.topLevelIndex
+    andIndex = model.index(2, 0, top)
+
+    # the child of the removed AND node is removed with its parent
+    indexes = [model.index(row, 0, top) for row in (3, 0, 2)]
+    removed = model.removeMany([*indexes, model.index(0, 0, andIndex)])
+
+    assert [repr(n) for n in removed] == ['a', 'AND[c,d]', 'e']
+    assert all(n.parent is None for n in removed)
+    assert repr(model.topNode) == 'OR[b]'
+    assert model.topNode.tagList[0].row == 0
+    # the last block is removed first, so rows of the first one stay valid
+    assert [s[2:] for s in signals] == [(2, 3), (0, 0)]
+    assert all(s[0] == 'removed' for s in signals)
+
+
+def testSequenceNodeInsertManyAndRemoveRows():
+    node = TagFilterOrNode([TagFilterNode('a'), TagFilterNode('b')])
+    node.insertMany(-1, [TagFilterNode('x'), TagFilterNode('y')])
+    node.insertMany(10, [TagFilterNode('z')])
+    assert repr(node) == 'OR[a,x,y,b,z]'
+    assert [n.row for n in node.tagList] == list(range(5))
+    assert all(n.parent is node for n in node.tagList)
+
+    removed = node.removeRows(1, 2)
+    assert [repr(n) for n in removed] == ['x', 'y']
+    assert [(n.parent, n.row) for n in removed] == [(None, -1)] * 2
+    assert [n.row for n in node.tagList] == list(range(3))
+    assert not node.compile()({'x'})
+
+    # rows of multiple removed blocks are updated once
+    node.removeRows(2, 1, updateRows=False)
+    node.removeRows(0, 1, updateRows=False)
+    assert repr(node) == 'OR[b]'
+    node.updateRows(0)
+    assert [n.row for n in node.tagList] == [0]
+
+
+@pytest.mark.parametrize(
+    ('value', 'expected'),
+    [
+        (None, ModelCheckMode.NONE),
+        ('sampling', ModelCheckMode.SAMPLING),
+        ('FULL', ModelCheckMode.FULL),
+        ('unknown', ModelCheckMode.NONE),
+    ],
+)
+def testModelCheckModeFromEnvironment(monkeypatch, value, expected):
+    if value is None:
+        monkeypatch.delenv(MODEL_CHECK_ENV, raising=False)
+    else:
+        monkeypatch.setenv(MODEL_CHECK_ENV, value)
+
+    assert ModelCheckMode.fromEnvironment() is expected
+    assert (createModelChecker(createModel()) is None) == (
+        expected is ModelCheckMode.NONE
+    )
+
+
+def testModelCheckerPassesValidChanges():
+    model = createModel()
+    checker = TagFilterModelChecker(model, sampleSize=2)
+    top = model.topLevelIndex
+
+    texts = ['x', 'y', 'z']
+    assert model.addMany(texts, top, 1) == len(texts)
+    assert model.addMany(['f'], model.index(5, 0, top)) == 1
+    model.removeMany([model.index(row, 0, top) for row in (0, 2, 3)])
+    model.negate(model.index(0, 0, top))
+
+    assert checker.failureCount == 0
+
+
+def testModelCheckerDetectsInconsistency():
+    model = createModel()
+    checker = TagFilterModelChecker(model)
+    top = model.topLevelIndex
+
+    # row is not updated, when `tagList` is modified without the model
+    model.topNode.tagList.reverse()
+    model.dataChanged.emit(model.index(0, 0, top), model.index(3, 0, top))
+    assert checker.failureCount > 0
+
+
+def testPossibleTagsModelFetchesLazily():
+    fetchSize = 10
+    values = [f'tag{i:03}' for i in range(25)]
+    model = PossibleTagsModel(SortedStringIndex(values), fetchSize=fetchSize)
+    assert model.rowCount() == fetchSize
+    assert model.canFetchMore(model.index(-1, 0))
+
+    model.fetchMore(model.index(-1, 0))
+    assert model.rowCount() == 2 * fetchSize
+    assert model.data(model.index(19, 0)) == 'tag019'
+    assert model.data(model.index(20, 0)) is None
+
+    index = model.indexOfValue('tag023')
+    assert (index.row(), index.data()) == (23, 'tag023')
+    assert model.rowCount() == index.row() + 1
+    assert not model.indexOfValue('missing').isValid()
+
+    values = ['a', 'b']
+    model.setSortedIndex(SortedStringIndex(values))
+    assert model.rowCount() == len(values)
+    assert not model.canFetchMore(model.index(-1, 0))
+
+
+def testPrefixCompletionModelFetchesOnlyMatches():
+    _app = QApplication.instance() or QApplication([])
+    values = [f'tag{i:03}' for i in range(250)]
+    index = SortedStringIndex(values, caseSensitive=False)
+    model = PrefixCompletionModel(index, fetchSize=10)
+    completer = QCompleter(model)
+    completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+    assert model.rowCount() == 0
+
+    model.setPrefix('TAG1')
+    completer.setCompletionPrefix('TAG1')
+    completions = completer.completionModel()
+    assert completions is not None
+    matches = [completions.index(r, 0).data() for r in range(completions.rowCount())]
+    assert matches == values[100:200]
+    # values outside of the prefix are never fetched
+    assert model.rowCount() == len(matches)
+    assert model.indexOfValue('tag150').data() == 'tag150'
+    assert not model.indexOfValue('tag050').isValid()
+
+
+def testTagFilterDialogValidatesCaseSensitively():
+    _app = QApplication.instance() or QApplication([])
+    values = ['beta', 'Alpha', 'alphabet']
+    dialog = TagFilterDialog(possibleValues=values)
+
+    validator = dialog.searchLineEdit.validator()
+    assert validator is not None
+    assert validator.validate('Alpha', 0)[0] == QValidator.State.Acceptable
+    assert validator.validate('ALPHA', 0)[0] == QValidator.State.Invalid
+    assert validator.validate('alpha', 0)[0] == QValidator.State.Intermediate
+
+    # search and completion are case-insensitive
+    dialog.searchLineEdit.setText('ALPHA')
+    assert dialog.possibleTagsWidget.currentIndex().data() == 'Alpha'
+    completer = dialog.searchLineEdit.completer()
+    assert completer is not None
+    completionModel = completer.model()
+    assert isinstance(completionModel, PrefixCompletionModel)
+    assert completionModel.rowCount() == 0
+    dialog.searchLineEdit.textEdited.emit('al')
+    assert [completionModel.index(r, 0).data() for r in range(2)] == values[1:]
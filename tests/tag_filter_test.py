@@ -0,0 +1,212 @@
+import io
+import itertools
+import pickle
+
+import pytest
+
+from pyqt_utils.widgets.tag_filter import serialization
+from pyqt_utils.widgets.tag_filter.bitset import TagBatch, TagVocabulary
+from pyqt_utils.widgets.tag_filter.index import TagIndex
+from pyqt_utils.widgets.tag_filter.nodes import (
+    TagFilterAndNode,
+    TagFilterExcludeNode,
+    TagFilterNode,
+    TagFilterOrNode,
+    TagFilterSequenceNode,
+)
+from pyqt_utils.widgets.tag_filter.optimizer import optimizeTree
+
+ALL_TAGS = ('a', 'b', 'c', 'd')
+ALL_RECORDS = [
+    set(tags)
+    for size in range(len(ALL_TAGS) + 1)
+    for tags in itertools.combinations(ALL_TAGS, size)
+]
+
+
+def createTree() -> TagFilterOrNode:
+    """Create tree: a OR (b AND NOT c) OR (NOT (c OR d))."""
+    return TagFilterOrNode(
+        [
+            TagFilterNode('a'),
+            TagFilterAndNode(
+                [TagFilterNode('b'), TagFilterExcludeNode(TagFilterNode('c'))]
+            ),
+            TagFilterExcludeNode(
+                TagFilterOrNode([TagFilterNode('c'), TagFilterNode('d')])
+            ),
+        ]
+    )
+
+
+@pytest.mark.parametrize(
+    'tree',
+    [
+        createTree(),
+        TagFilterOrNode(),
+        TagFilterAndNode(),
+        TagFilterExcludeNode(TagFilterAndNode()),
+    ],
+    ids=repr,
+)
+def testCompileMatchesIsAccepted(tree: TagFilterNode):
+    predicate = tree.compile()
+    for record in ALL_RECORDS:
+        assert predicate(record) == tree.isAccepted(record), record
+
+
+def testFilterBatchMatchesIsAccepted():
+    tree = createTree()
+    expected = [tree.isAccepted(r) for r in ALL_RECORDS]
+    assert tree.filterBatch(ALL_RECORDS) == expected
+
+    vocabulary = TagVocabulary()
+    masks = [vocabulary.encode(r) for r in ALL_RECORDS]
+    assert tree.filterBatch(TagBatch.fromMasks(masks, vocabulary)) == expected
+
+
+def testIndexQueryMatchesIsAccepted():
+    tree = createTree()
+    index = TagIndex(dict(enumerate(ALL_RECORDS)))
+    expected = {i for i, r in enumerate(ALL_RECORDS) if tree.isAccepted(r)}
+    assert index.query(tree) == expected
+
+    index.remove(0)
+    index.add(1, ['c'])
+    expected -= {0, 1}
+    assert index.query(tree) == expected
+
+
+def testOptimizeTreeIsEquivalent():
+    tree = createTree()
+    tree.insert(0, TagFilterOrNode([TagFilterNode('d'), TagFilterNode('a')]))
+    tree.insert(0, TagFilterExcludeNode(TagFilterExcludeNode(TagFilterNode('c'))))
+    optimized = optimizeTree(tree, {'a': 0.1, 'b': 0.5, 'c': 0.9, 'd': 0.3})
+
+    assert repr(optimized) == 'OR[c,d,a,NOT[OR[c,d]],AND[NOT[c],b]]'
+    for record in ALL_RECORDS:
+        assert optimized.isAccepted(record) == tree.isAccepted(record), record
+
+
+@pytest.mark.parametrize(
+    ('tree', 'expected'),
+    [
+        (TagFilterExcludeNode(TagFilterExcludeNode(TagFilterNode('a'))), 'NOT[NOT[a]]'),
+        (TagFilterAndNode([TagFilterOrNode([TagFilterNode('a')])]), 'AND[a]'),
+    ],
+)
+def testOptimizeTreeKeepsTopNodeType(tree: TagFilterNode, expected: str):
+    optimized = optimizeTree(tree, {'a': 0.5})
+
+    assert type(optimized) is type(tree)
+    assert repr(optimized) == expected
+    for record in ALL_RECORDS:
+        assert optimized.isAccepted(record) == tree.isAccepted(record), record
+
+
+def testCompileIsInvalidatedByModification():
+    tree = createTree()
+    predicate = tree.compile()
+    assert tree.compile() is predicate
+
+    assert predicate({'a', 'c'})
+    tree.remove(tree.tagList[0])
+    assert tree.compile() is not predicate
+    assert not tree.compile()({'a', 'c'})
+
+    excludeNode = tree.tagList[1]
+    assert isinstance(excludeNode, TagFilterExcludeNode)
+    predicate = tree.compile()
+    content = excludeNode.content
+    assert isinstance(content, TagFilterSequenceNode)
+    content.insert(0, TagFilterNode('a'))
+    assert predicate({'a'})
+    assert not tree.compile()({'a'})
+
+
+def testCompileIsInvalidatedByAssignment():
+    tree = createTree()
+    predicate = tree.compile()
+    tree.tagList[0].tagName = 'd'
+    assert tree.compile() is not predicate
+    for record in ALL_RECORDS:
+        assert tree.compile()(record) == tree.isAccepted(record), record
+
+    newNode = TagFilterNode('x')
+    tree.tagList = [newNode]
+    assert (newNode.parent, newNode.row) == (tree, 0)
+    assert tree.compile()({'x'})
+
+    # in-place modification of `tagList` requires explicit invalidation
+    tree.tagList.append(TagFilterNode('y'))
+    assert not tree.compile()({'y'})
+    tree.invalidateCompiled()
+    assert tree.compile()({'y'})
+
+
+def testCompiledTreeCanBeSerialized():
+    tree = createTree()
+    tree.compile()
+    restored = TagFilterNode.deserialize(tree.serialize())
+    assert repr(restored) == repr(tree)
+
+
+def testSerializationFormats():
+    tree = createTree()
+    tree.insert(0, TagFilterAndNode())
+    tree.tagList[1].tagName = 'zażółć'
+
+    restored = serialization.loadsJson(serialization.dumpsJson(tree))
+    assert repr(restored) == repr(tree)
+
+    stream = io.BytesIO()
+    serialization.dump([tree, TagFilterNode('a')], stream)
+    stream.seek(0)
+    assert [repr(n) for n in serialization.load(stream)] == [repr(tree), 'a']
+
+    # attributes behind properties are pickled with their public names
+    assert {'tagList', 'parent'} <= tree.__getstate__().keys()
+    legacy = pickle.dumps(tree, protocol=0)
+    assert repr(TagFilterOrNode.migrateLegacyPickle(legacy)) == repr(tree)
+    with pytest.raises(serialization.TagFilterFormatError):
+        TagFilterOrNode.deserialize(legacy)
+    with pytest.raises(serialization.TagFilterFormatError):
+        serialization.loads(tree.serialize()[:-1])
+
+
+def createChain(depth: int) -> TagFilterNode:
+    node = TagFilterNode('a')
+    for _ in range(depth):
+        node = TagFilterExcludeNode(node)
+    return node
+
+
+def testSerializationDepthLimit():
+    deepest = createChain(serialization.MAX_DEPTH)
+    data = serialization.dumps(deepest)
+    assert serialization.dumps(serialization.loads(data)) == data
+    text = serialization.dumpsJson(deepest)
+    assert serialization.dumpsJson(serialization.loadsJson(text)) == text
+
+    # trees, which cannot be loaded, are not written
+    tooDeep = createChain(serialization.MAX_DEPTH + 1)
+    with pytest.raises(serialization.TagFilterFormatError, match='depth'):
+        serialization.dumps(tooDeep)
+    with pytest.raises(serialization.TagFilterFormatError, match='depth'):
+        serialization.dumpsJson(tooDeep)
+
+
+def testRowsAreUpdatedBySequenceModification():
+    tree = createTree()
+    first, second, third = tree.tagList
+    tree.insert(1, TagFilterNode('e'))
+    tree.remove(first)
+
+    assert [tree.rowOf(n) for n in tree.tagList] == [0, 1, 2]
+    assert tree.tagList[tree.rowOf(third)] is third
+    assert first.row == -1
+    with pytest.raises(ValueError, match='is not a child'):
+        tree.rowOf(first)
+
+    tree.tagList.reverse()
+    assert tree.rowOf(second) == 1